@@ -2,6 +2,7 @@
 
 import click
 from ne_lint import helptexts
+from ne_lint.yamllint_ext import http_client
 
 CLICK_CONTEXT_SETTINGS = dict(
     help_option_names=['-h', '--help'])
@@ -60,7 +61,9 @@ class Options(object):
 
         self.blueprint_path = click.argument(
             'blueprint-path',
-            type=click.Path(exists=True),
+            nargs=-1,
+            required=True,
+            type=click.STRING,
         )
 
         self.blueprint_path_dep = click.option(
@@ -119,6 +122,74 @@ class Options(object):
             multiple=True,
             help=helptexts.fix)
 
+        self.jobs = click.option(
+            '-j',
+            '--jobs',
+            default=1,
+            type=click.IntRange(min=1),
+            multiple=False,
+            help=helptexts.j)
+
+        self.no_cache = click.option(
+            '--no-cache',
+            default=False,
+            type=click.BOOL,
+            is_flag=True,
+            multiple=False,
+            help=helptexts.nc)
+
+        self.offline = click.option(
+            '--offline',
+            default=False,
+            type=click.BOOL,
+            is_flag=True,
+            multiple=False,
+            help=helptexts.offline)
+
+        self.network_timeout = click.option(
+            '--network-timeout',
+            default=http_client.DEFAULT_TIMEOUT,
+            type=click.FloatRange(min=0, min_open=True),
+            multiple=False,
+            help=helptexts.timeout)
+
+        self.network_deadline = click.option(
+            '--network-deadline',
+            default=http_client.DEFAULT_DEADLINE,
+            type=click.FloatRange(min=0, min_open=True),
+            multiple=False,
+            help=helptexts.deadline)
+
+        self.plugins = click.argument(
+            'plugins',
+            nargs=-1,
+            required=False,
+            type=click.STRING,
+        )
+
+        self.blueprint_dir = click.option(
+            '-d',
+            '--blueprint-dir',
+            type=click.STRING,
+            multiple=True,
+            help=helptexts.d)
+
+        self.latest = click.option(
+            '--latest',
+            default=False,
+            type=click.BOOL,
+            is_flag=True,
+            multiple=False,
+            help=helptexts.latest)
+
+        self.warm_jobs = click.option(
+            '-j',
+            '--jobs',
+            default=8,
+            type=click.IntRange(min=1),
+            multiple=False,
+            help=helptexts.wj)
+
         self.fix_only = click.option(
             '-fo',
             '--fix-only',
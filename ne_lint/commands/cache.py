@@ -0,0 +1,128 @@
+# Copyright © 2023 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+import os
+import sys
+import yaml
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+
+from ne_lint import cli
+from ne_lint.logger import logger
+from ne_lint.commands.lint import find_blueprints
+from ne_lint.yamllint_ext import backends, http_client, utils
+from ne_lint.yamllint_ext.cache import evict, run_refreshes
+from ne_lint.yamllint_ext.constants import LATEST_PLUGIN_YAMLS
+
+
+@cli.group('cache')
+def cache():
+    """Manage the cache of imported plugins and URLs."""
+
+
+@cache.command('warm')
+@cli.options.plugins
+@cli.options.blueprint_dir
+@cli.options.latest
+@cli.options.warm_jobs
+@cli.options.verbose
+def warm(plugins, blueprint_dir, latest, jobs, verbose):
+    """Cache the given plugin imports before linting.
+
+    PLUGINS are plugin names or plugin imports, e.g.
+    "nativeedge-aws-plugin" or "plugin:nativeedge-aws-plugin?version=3.2.1".
+    """
+    try:
+        import_items = get_imports_to_warm(plugins, blueprint_dir, latest)
+    except RuntimeError as e:
+        if verbose:
+            raise e
+        logger.error(str(e))
+        sys.exit(1)
+    if not import_items:
+        raise cli.click.UsageError(
+            'Give plugins, --blueprint-dir or --latest to cache.')
+    failed = False
+    for import_item, error in warm_imports(import_items, jobs):
+        if error:
+            logger.error('Failed to cache {}: {}'.format(import_item, error))
+            failed = True
+        else:
+            logger.info('Cached {}'.format(import_item))
+    # Imports that were cached but stale are fetched again.
+    run_refreshes()
+    evict(utils.get_runtime_cache_dir())
+    if failed:
+        sys.exit(1)
+
+
+def get_imports_to_warm(plugins=None, blueprint_dirs=None, latest=False):
+    """Return the remote imports to cache, without duplicates.
+
+    :param plugins: Plugin names or plugin imports.
+    :param blueprint_dirs: Blueprints, or directories of blueprints, to
+        cache the plugin and URL imports of.
+    :param latest: Whether to cache the latest version of every plugin
+        in LATEST_PLUGIN_YAMLS.
+    """
+    import_items = []
+    for plugin in plugins or ():
+        if not urlparse(plugin).scheme:
+            plugin = 'plugin:{}'.format(plugin)
+        import_items.append(plugin)
+    if blueprint_dirs:
+        for file_path in find_blueprints(blueprint_dirs):
+            import_items.extend(get_remote_imports(file_path))
+    if latest:
+        import_items.extend('plugin:{}'.format(plugin_name)
+                            for plugin_name in LATEST_PLUGIN_YAMLS)
+    return list(dict.fromkeys(import_items))
+
+
+def get_remote_imports(file_path):
+    """Return the plugin and URL imports of a blueprint.
+
+    Local imports are followed for the imports that they have, like the
+    lint does, see utils.ImportGraph. Nothing is requested for that, and
+    remote imports are only followed where they are cached already.
+    """
+    try:
+        with open(file_path, 'r') as stream:
+            data = backends.safe_load(stream)
+    except (OSError, yaml.YAMLError) as e:
+        logger.warning('Not reading the imports of {}: {}'.format(
+            file_path, e))
+        return []
+    if not isinstance(data, dict) or \
+            not isinstance(data.get('imports'), list):
+        return []
+    base_path = os.path.dirname(os.path.abspath(file_path))
+    with http_client.NetworkSettings(offline=True).active():
+        edges = utils.import_graph.load(
+            [(import_item, base_path) for import_item in data['imports']
+             if isinstance(import_item, str)])
+    return [import_item for import_item, _ in edges
+            if urlparse(import_item).scheme in utils.REMOTE_IMPORT_SCHEMES]
+
+
+def warm_imports(import_items, jobs=1):
+    """Read imports into the cache, in a pool of threads.
+
+    :return: A generator of (import, error) in the order of import_items,
+        where the error is None if the import was cached.
+    """
+    with ThreadPoolExecutor(
+            max_workers=max(1, min(jobs, len(import_items)))) as pool:
+        yield from zip(import_items, pool.map(warm_import, import_items))
+
+
+def warm_import(import_item):
+    try:
+        source, _ = utils.fetch_import(import_item)
+    except (OSError, ValueError) as e:
+        return str(e) or type(e).__name__
+    if source in ['stale', 'unavailable']:
+        return 'Unable to read it.'
+    if utils.get_import_digest(import_item) is None:
+        if source == 'plugin':
+            return 'The plugin has no node types on the marketplace.'
+        return 'Not cached.'
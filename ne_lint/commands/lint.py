@@ -4,15 +4,25 @@ import io
 import os
 import re
 import sys
+import glob
 import json
-import urllib
+import pickle
+import fnmatch
+import multiprocessing
 from re import sub
 from logging import (Formatter, StreamHandler)
 
 from ne_lint import cli, __version__
-from ne_lint.yamllint_ext import (run, rules)
+from ne_lint.yamllint_ext import (run, rules, cache, http_client)
+from ne_lint.yamllint_ext.cache import evict
 from ne_lint.logger import logger, stream_handler
+from ne_lint.yamllint_ext.utils import LintSession, get_runtime_cache_dir
 from ne_lint.yamllint_ext.config import YamlLintConfigExt
+from ne_lint.yamllint_ext.result_cache import ResultCache
+
+BLUEPRINT_PATTERN = '*.yaml'
+# The Worker of a pool worker process, see init_worker.
+worker = None
 
 
 def report_both_fix_autofix(af, f):
@@ -44,6 +54,11 @@ def format_json(format):
 @cli.options.autofix
 @cli.options.fix
 @cli.options.fix_only
+@cli.options.jobs
+@cli.options.no_cache
+@cli.options.offline
+@cli.options.network_timeout
+@cli.options.network_deadline
 @cli.click.version_option(__version__.version)
 def lint(blueprint_path,
          config,
@@ -53,6 +68,11 @@ def lint(blueprint_path,
          autofix=False,
          fix=None,
          fix_only=False,
+         jobs=1,
+         no_cache=False,
+         offline=False,
+         network_timeout=http_client.DEFAULT_TIMEOUT,
+         network_deadline=http_client.DEFAULT_DEADLINE,
          **_):
 
     if fix_only:
@@ -61,43 +81,227 @@ def lint(blueprint_path,
     fix = report_both_fix_autofix(autofix, fix)
     format_json(format)
 
-    yaml_config = YamlLintConfigExt(content=config, yamllint_rules=rules)
     skip_suggestions = skip_suggestions or ()
     try:
-        report = create_report_for_file(
-            blueprint_path,
-            yaml_config,
-            skip_suggestions=skip_suggestions,
-            fix=fix,
-            fix_only=fix_only)
-    except Exception as e:
+        blueprint_paths = find_blueprints(blueprint_path)
+    except RuntimeError as e:
         if verbose:
             raise e
-        else:
-            exception_str = str(e)
-        logger.error(exception_str)
+        logger.error(str(e))
         sys.exit(1)
 
+    failed = False
+    for file_path, report, error in lint_blueprints(blueprint_paths,
+                                                    config,
+                                                    jobs,
+                                                    skip_suggestions,
+                                                    fix,
+                                                    fix_only,
+                                                    not no_cache,
+                                                    offline,
+                                                    network_timeout,
+                                                    network_deadline):
+        logger.info('Linting blueprint: {}'.format(file_path))
+        if error:
+            if verbose:
+                raise error
+            logger.error(str(error))
+            failed = True
+            continue
+        # Name the blueprint of each problem when linting many of them.
+        log_report(report,
+                   format,
+                   file_path if len(blueprint_paths) > 1 else None)
+
+    # The stale cache entries that the lints used are refreshed once they
+    # are done, within the network deadline.
+    with http_client.NetworkSettings(offline,
+                                     network_timeout,
+                                     network_deadline).active():
+        cache.run_refreshes(network_deadline)
+    evict(get_runtime_cache_dir())
+    if failed:
+        sys.exit(1)
+
+
+def log_report(report, format=None, file_path=None):
     cnt = 0
-    try:
-        for item in report:
-            message = formatted_message(item, format)
-            if cnt == 0:
-                logger.info('The following linting errors were found: ')
-                cnt += 1
-            if item.level == 'warning':
-                logger.warning(message)
-            elif item.level == 'error':
-                logger.error(message)
-            else:
-                logger.info(message)
-    except urllib.error.URLError as e:
-        if verbose:
-            raise e
+    for item in report:
+        message = formatted_message(item, format, file_path=file_path)
+        if cnt == 0:
+            logger.info('The following linting errors were found: ')
+            cnt += 1
+        if item.level == 'warning':
+            logger.warning(message)
+        elif item.level == 'error':
+            logger.error(message)
         else:
-            exception_str = str(e)
-        logger.error(exception_str)
-        sys.exit(1)
+            logger.info(message)
+
+
+def find_blueprints(paths):
+    """Expand blueprint files, directories and globs.
+
+    Directories are searched recursively for *.yaml files.
+
+    :param paths: The blueprint paths from the command line.
+    :return: A list of blueprint paths, sorted within each directory or
+        glob and without duplicates.
+    """
+    blueprints = []
+    for path in paths:
+        if re.search(r'[*?[]', path):
+            matches = sorted(glob.glob(path, recursive=True))
+            if not matches:
+                raise RuntimeError(
+                    'No blueprints match the pattern: {}.'.format(path))
+        else:
+            matches = [path]
+        for match in matches:
+            if os.path.isdir(match):
+                for root, dirs, files in os.walk(match):
+                    dirs.sort()
+                    blueprints.extend(
+                        os.path.join(root, name) for name in sorted(files)
+                        if fnmatch.fnmatch(name, BLUEPRINT_PATTERN))
+            elif os.path.exists(match):
+                blueprints.append(match)
+            else:
+                raise RuntimeError(
+                    'File path does not exist: {}.'.format(match))
+    return list(dict.fromkeys(blueprints))
+
+
+def lint_blueprints(file_paths,
+                    config=None,
+                    jobs=1,
+                    skip_suggestions=None,
+                    fix=None,
+                    fix_only=False,
+                    use_cache=False,
+                    offline=False,
+                    network_timeout=http_client.DEFAULT_TIMEOUT,
+                    network_deadline=None):
+    """Lint blueprints, in a pool of worker processes when jobs > 1.
+
+    Each worker loads the configuration once and lints many blueprints.
+    Offline, imports are only read from the cache. The refreshes that the
+    lints put off are left to this process, see cache.run_refreshes().
+
+    :param network_timeout: The seconds to wait for every request.
+    :param network_deadline: The seconds that the requests of each
+        blueprint may take in all, or None for no limit.
+
+    :return: A generator of (file path, problems, error) in the order of
+        file_paths.
+    """
+    args = [(file_path, skip_suggestions, fix, fix_only)
+            for file_path in file_paths]
+    init_args = (config, use_cache, offline, network_timeout, network_deadline)
+    if jobs == 1 or len(file_paths) < 2:
+        # Linting in this process, the state is not shared with other
+        # callers.
+        state = Worker(*init_args)
+        yield from put_off_refreshes(
+            file_paths,
+            (lint_in_worker(lint_args, state) for lint_args in args))
+        return
+    with multiprocessing.Pool(min(jobs, len(file_paths)),
+                              initializer=init_worker,
+                              initargs=init_args) as pool:
+        yield from put_off_refreshes(file_paths,
+                                     pool.imap(lint_in_worker, args))
+
+
+def put_off_refreshes(file_paths, results):
+    """Put off the refreshes of lints in this process.
+
+    :param results: What lint_in_worker returned for every file path.
+    :return: A generator of (file path, problems, error).
+    """
+    for file_path, (problems, error, refreshes) in zip(file_paths, results):
+        for key, refresh in refreshes:
+            cache.refresh_later(key, refresh)
+        yield file_path, problems, error
+
+
+class Worker(object):
+    """What a worker loads once and uses for every blueprint it lints.
+
+    The network settings are made for every blueprint, so that each one
+    gets its own deadline.
+    """
+
+    def __init__(self,
+                 config=None,
+                 use_cache=False,
+                 offline=False,
+                 network_timeout=http_client.DEFAULT_TIMEOUT,
+                 network_deadline=None):
+        self.conf = YamlLintConfigExt(content=config, yamllint_rules=rules)
+        self.cache = ResultCache() if use_cache else None
+        self.offline = offline
+        self.network_timeout = network_timeout
+        self.network_deadline = network_deadline
+
+    def network_settings(self):
+        return http_client.NetworkSettings(self.offline,
+                                           self.network_timeout,
+                                           self.network_deadline)
+
+
+def init_worker(*args):
+    global worker
+    worker = Worker(*args)
+
+
+def lint_in_worker(args, state=None):
+    """Lint a blueprint with the state of a worker.
+
+    :return: The problems, the error that the lint failed with or None,
+        and the refreshes that it put off, see cache.take_refreshes().
+    """
+    file_path, skip_suggestions, fix, fix_only = args
+    state = state or worker
+    try:
+        with state.network_settings().active():
+            result = lint_blueprint(file_path,
+                                    state.conf,
+                                    skip_suggestions,
+                                    fix,
+                                    fix_only,
+                                    state.cache), None
+    except (Exception, SystemExit) as e:
+        # A worker that exits returns nothing, and the pool waits for it.
+        if isinstance(e, SystemExit):
+            e = RuntimeError('Linting exited with {}.'.format(e.code))
+        try:
+            pickle.dumps(e)
+        except Exception:
+            e = RuntimeError(str(e))
+        result = [], e
+    return result + (cache.take_refreshes(),)
+
+
+def lint_blueprint(file_path,
+                   conf,
+                   skip_suggestions=None,
+                   fix=None,
+                   fix_only=False,
+                   result_cache=None):
+    """Lint a blueprint to completion.
+
+    :return: A list of LintProblem.
+    """
+    with open_blueprint(file_path) as f:
+        return list(run_with_cache(f,
+                                   file_path,
+                                   conf,
+                                   False,
+                                   skip_suggestions,
+                                   fix,
+                                   fix_only,
+                                   result_cache))
 
 
 def create_report_for_file(file_path,
@@ -105,20 +309,65 @@ def create_report_for_file(file_path,
                            create_report_for_file=False,
                            skip_suggestions=None,
                            fix=None,
-                           fix_only=False):
-    if not os.path.exists(file_path):
-        raise RuntimeError('File path does not exist: {}.'.format(file_path))
-    logger.info('Linting blueprint: {}'.format(file_path))
-    with io.open(file_path, newline='') as f:
+                           fix_only=False,
+                           result_cache=None):
+    with open_blueprint(file_path) as f:
+        logger.info('Linting blueprint: {}'.format(file_path))
+        return run_with_cache(f,
+                              file_path,
+                              conf,
+                              create_report_for_file,
+                              skip_suggestions,
+                              fix,
+                              fix_only,
+                              result_cache)
+
+
+def run_with_cache(f,
+                   file_path,
+                   conf,
+                   create_report_for_file=False,
+                   skip_suggestions=None,
+                   fix=None,
+                   fix_only=False,
+                   result_cache=None):
+    """Replay the problems of an unchanged blueprint, or lint it.
+
+    Fixes change the blueprint, so they always lint it. The problems of a
+    lint that used stale, unavailable or uncached imports are not stored.
+    """
+    if result_cache is None or fix:
         return run(f,
                    conf,
                    create_report_for_file,
                    skip_suggestions,
                    fix,
                    fix_only)
+    key = result_cache.key(f.read(), file_path, conf, skip_suggestions)
+    problems = result_cache.get(key)
+    if problems is None:
+        f.seek(0)
+        session = LintSession()
+        problems = list(run(f,
+                            conf,
+                            create_report_for_file,
+                            skip_suggestions,
+                            session=session))
+        # A lint that could not read some imports is redone next time,
+        # once they may be read again.
+        if not session['uncached_imports'] and \
+                not session['unavailable_imports']:
+            result_cache.put(key, problems, session['resolved_imports'])
+    return problems
+
+
+def open_blueprint(file_path):
+    if not os.path.exists(file_path):
+        raise RuntimeError('File path does not exist: {}.'.format(file_path))
+    return io.open(file_path, newline='')
 
 
-def formatted_message(item, format=None, json_dumps=True):
+def formatted_message(item, format=None, json_dumps=True, file_path=None):
     if format == 'json':
         rule, item_message = item.message.split(':', 1)
         try:
@@ -136,7 +385,11 @@ def formatted_message(item, format=None, json_dumps=True):
             "message": item_message,
             "severity": int(severity),
         }
+        if file_path:
+            data["file"] = file_path
         if json_dumps:
             data = json.dumps(data)
         return data
+    if file_path:
+        return '{0}:{1: <4}: {2:>4}'.format(file_path, item.line, item.message)
     return '{0: <4}: {1:>4}'.format(item.line, item.message)
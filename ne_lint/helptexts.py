@@ -21,3 +21,23 @@ v = """Show verbose output, including exceptions."""
 xs = """Do not display suggested values for supported sections."""
 
 fo = """Fix all issues like autofix flag without linting again."""
+
+j = """The number of blueprints to lint in parallel processes."""
+
+nc = """Lint every blueprint, even when its results are cached."""
+
+offline = """Never use the network, read imports only from the cache.
+Imports that are not cached are reported as problems."""
+
+d = """Cache the plugin and URL imports of the blueprints in a directory.
+The "-d" flag can be used multiple times."""
+
+latest = """Cache the latest version of every known NativeEdge plugin."""
+
+timeout = """The seconds to wait for the network in every request."""
+
+deadline = """The seconds that the requests of a blueprint may take in all.
+Imports that are not read by then are read from the cache, if cached,
+and reported as problems."""
+
+wj = """The number of imports to read in parallel."""
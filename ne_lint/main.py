@@ -1,7 +1,22 @@
 # Copyright © 2025 Dell Inc. or its subsidiaries. All Rights Reserved.
 
+import sys
+
+from ne_lint import cli
 from ne_lint.commands.lint import lint
+from ne_lint.commands.cache import cache
+
+
+def main():
+    """Run "ne-lint cache <command>", otherwise lint."""
+    args = sys.argv[1:]
+    if args[:1] == ['cache'] and args[1:2] and (
+            args[1] in cache.commands or
+            args[1] in cli.CLICK_CONTEXT_SETTINGS['help_option_names']):
+        cache(args=args[1:], prog_name='ne-lint cache')
+    else:
+        lint()
 
 
 if __name__ == "__main__":
-    lint()
+    main()
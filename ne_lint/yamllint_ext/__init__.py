@@ -9,17 +9,17 @@ from ne_lint.yamllint_ext.constants import (
 from ne_lint.yamllint_ext.generators import (
     NENode,
     NEToken,
+    ParsedBlueprint,
     YamlParserLintProblem,
     token_or_comment_or_line_generator,
 )
 from ne_lint.yamllint_ext.overrides import (
     LintProblem,
-    spaces_after,
-    spaces_before,
     get_syntax_error
 )
 from ne_lint.yamllint_ext.utils import (
-    context,
+    LintSession,
+    get_session,
     setup_types,
     update_model,
     setup_node_templates,
@@ -46,24 +46,47 @@ def get_cosmetic_problems(buffer,
                           conf,
                           filepath,
                           base_path=None,
-                          skip_suggestions=None):
-
-    setup_types(buffer, base_path=base_path)
-
-    rules = conf.enabled_rules(filepath)
-
-    # Split token rules from line rules
-    token_rules = [r for r in rules if r.TYPE == 'token']
-    comment_rules = [r for r in rules if r.TYPE == 'comment']
-    line_rules = [r for r in rules if r.TYPE == 'line']
-
-    for rule in token_rules:
-        context[rule.ID] = {}
+                          skip_suggestions=None,
+                          parsed=None,
+                          session=None):
+
+    session = session or get_session()
+    # The rules reach the session through context, keep it active only
+    # while they run and not across the yields to the caller.
+    with session.active():
+        problems = list(_get_cosmetic_problems(buffer,
+                                               conf,
+                                               filepath,
+                                               base_path,
+                                               skip_suggestions,
+                                               parsed,
+                                               session))
+    yield from problems
+
+
+def _get_cosmetic_problems(buffer,
+                           conf,
+                           filepath,
+                           base_path,
+                           skip_suggestions,
+                           parsed,
+                           session):
+
+    parsed = parsed or ParsedBlueprint(buffer)
+    setup_types(buffer, base_path=base_path, parsed=parsed)
+
+    # The rules come split by type, paired with their configuration and
+    # with the NE rules indexed by the keys of the sections they check.
+    rule_set = conf.rule_set(filepath)
+    node_rules = rule_set.node_rules
+
+    for rule_id in rule_set.token_rule_ids:
+        session[rule_id] = {}
 
     class DisableDirective:
         def __init__(self):
             self.rules = set()
-            self.all_rules = {r.ID for r in rules}
+            self.all_rules = rule_set.ids
 
         def process_comment(self, comment):
             try:
@@ -118,46 +141,37 @@ def get_cosmetic_problems(buffer,
     disabled_for_line = DisableLineDirective()
     disabled_for_next_line = DisableLineDirective()
 
-    for elem in token_or_comment_or_line_generator(buffer):
+    for elem in token_or_comment_or_line_generator(buffer, parsed):
         if isinstance(elem, YamlParserLintProblem):
             yield LintProblem(elem.line, elem. column, elem.desc)
 
         if isinstance(elem, NENode):
             setup_node_templates(elem)
-            for rule in token_rules:
-                rule_conf = conf.rules[rule.ID]
-                elem.blueprint_path = base_path
-                try:
-                    problems = rule.check(
-                        conf=rule_conf,
-                        token=elem,
-                        context=context[rule.ID],
-                        node_types=context.get('imported_node_types', {}),
-                        skip_suggestions=skip_suggestions)
-                except TypeError:
-                    continue
-                else:
-                    for problem in problems:
-                        problem.rule = rule.ID
-                        problem.level = rule_conf['level']
-                        cache.append(problem)
+            elem.blueprint_path = base_path
+            keyword = elem.prev.node.value if elem.prev else None
+            if not isinstance(keyword, str):
+                continue
+            for rule, rule_conf in node_rules.get(keyword, ()):
+                problems = rule.check(
+                    conf=rule_conf,
+                    token=elem,
+                    context=session[rule.ID],
+                    node_types=session.get('imported_node_types', {}),
+                    skip_suggestions=skip_suggestions)
+                for problem in problems:
+                    problem.rule = rule.ID
+                    problem.level = rule_conf['level']
+                    cache.append(problem)
 
         elif isinstance(elem, NEToken):
             update_model(elem)
-            for rule in token_rules:
-                if hasattr(rule, 'LintProblem'):
-                    rule.LintProblem = LintProblem
-                if hasattr(rule, 'spaces_before'):
-                    rule.spaces_before = spaces_before
-                if hasattr(rule, 'spaces_after'):
-                    rule.spaces_after = spaces_after
-                rule_conf = conf.rules[rule.ID]
+            for rule, rule_conf in rule_set.token_rules:
                 problems = rule.check(rule_conf,
                                       elem.curr,
                                       elem.prev,
                                       elem.after,
                                       elem.nextnext,
-                                      context[rule.ID])
+                                      session[rule.ID])
                 for problem in problems:
                     problem.rule = rule.ID
                     if problem.rule in ['truthy']:
@@ -166,14 +180,7 @@ def get_cosmetic_problems(buffer,
                     cache.append(problem)
 
         elif isinstance(elem, parser.Comment):
-            for rule in comment_rules:
-                if hasattr(rule, 'LintProblem'):
-                    rule.LintProblem = LintProblem
-                if hasattr(rule, 'spaces_before'):
-                    rule.spaces_before = spaces_before
-                if hasattr(rule, 'spaces_after'):
-                    rule.spaces_after = spaces_after
-                rule_conf = conf.rules[rule.ID]
+            for rule, rule_conf in rule_set.comment_rules:
                 for problem in rule.check(rule_conf, elem):
                     problem.rule = rule.ID
                     problem.level = rule_conf['level']
@@ -186,14 +193,7 @@ def get_cosmetic_problems(buffer,
                 disabled_for_next_line.process_comment(elem)
 
         elif isinstance(elem, parser.Line):
-            for rule in line_rules:
-                if hasattr(rule, 'LintProblem'):
-                    rule.LintProblem = LintProblem
-                if hasattr(rule, 'spaces_before'):
-                    rule.spaces_before = spaces_before
-                if hasattr(rule, 'spaces_after'):
-                    rule.spaces_after = spaces_after
-                rule_conf = conf.rules[rule.ID]
+            for rule, rule_conf in rule_set.line_rules:
                 for problem in rule.check(rule_conf, elem):
                     problem.rule = rule.ID
                     if problem.rule in ['trailing-spaces',
@@ -206,14 +206,14 @@ def get_cosmetic_problems(buffer,
     # if this runs with the other loop, we will not have a chance
     # to check usage of plugins in the blueprint, before
     # it is reported.
-    for import_item, problem in context.get(
+    for import_item, problem in session.get(
             'post_processing_problems', {}).items():
-        if import_item in context[UNUSED_IMPORT_CTX]:
+        if import_item in session[UNUSED_IMPORT_CTX]:
             problem.rule = import_rule
             problem.level = 'error'
             cache.append(problem)
 
-    for _, problem in context.get(UNUSED_INPUTS, {}).items():
+    for _, problem in session.get(UNUSED_INPUTS, {}).items():
         problem.rule = input_rule
         problem.level = 'error'
         cache.append(problem)
@@ -237,7 +237,33 @@ def _run(buffer,
          input_file=None,
          skip_suggestions=None,
          fix=None,
-         fix_only=False):
+         fix_only=False,
+         session=None):
+
+    # Each run starts from a fresh session, unless the caller owns one.
+    session = session or LintSession()
+    with session.active():
+        problems = list(_run_in_session(buffer,
+                                        conf,
+                                        filepath,
+                                        base_path,
+                                        input_file,
+                                        skip_suggestions,
+                                        fix,
+                                        fix_only,
+                                        session))
+    yield from problems
+
+
+def _run_in_session(buffer,
+                    conf,
+                    filepath,
+                    base_path,
+                    input_file,
+                    skip_suggestions,
+                    fix,
+                    fix_only,
+                    session):
 
     fix = fix or []
     add_label = False
@@ -247,19 +273,25 @@ def _run(buffer,
     assert hasattr(buffer, '__getitem__'), \
         '_run() argument must be a buffer, not a stream'
 
-    first_line = next(parser.line_generator(buffer)).content
+    # Every phase below reads the tokens, nodes and data from this single
+    # parse of the buffer.
+    parsed = ParsedBlueprint(buffer)
+
+    first_line = parsed.lines[0].content
     if re.match(r'^#\s*yamllint disable-file\s*$', first_line):
         return
 
     # If the document contains a syntax error, save it and yield it at the
     # right line
-    syntax_error = get_syntax_error(buffer)
+    syntax_error = get_syntax_error(buffer, parsed)
 
     problems = list(get_cosmetic_problems(buffer,
                                           conf,
                                           filepath,
                                           base_path,
-                                          skip_suggestions))
+                                          skip_suggestions,
+                                          parsed,
+                                          session))
 
     sorted_problems = sorted(problems, key=lambda x: x.line)
     sorted_problems = remove_consecutive_indentation_problems(sorted_problems)
@@ -312,14 +344,14 @@ def _run(buffer,
     if extra_empty_line:
         fix_empty_lines(problem)
 
-    if context['line_diff'] or context['add_label']:
+    if session['line_diff'] or session['add_label']:
         build_diff_lines()
 
     # Fix the lines in the error message according to the dictionary we created
     if not fix_only:
         index = 0
-        lines = list(context['line_diff'].keys())
-        values = list(context['line_diff'].values())
+        lines = list(session['line_diff'].keys())
+        values = list(session['line_diff'].values())
         len_lines = len(lines)
 
         for problem in sorted_problems:
@@ -359,7 +391,8 @@ def run(input,
         filepath=None,
         skip_suggestions=None,
         fix=None,
-        fix_only=False):
+        fix_only=False,
+        session=None):
     """Lints a YAML source.
 
     Returns a generator of LintProblem objects.
@@ -369,6 +402,7 @@ def run(input,
     :param filepath: The config file path.
     :param skip_suggestions: Do not suggest changes in lint message.
     :param autofix: fix changes in place.
+    :param session: The LintSession to collect the state of the run in.
     """
     skip_suggestions = skip_suggestions or ()
     if conf.is_file_ignored(filepath):
@@ -385,7 +419,8 @@ def run(input,
                     base_path=base_path,
                     skip_suggestions=skip_suggestions,
                     fix=fix,
-                    fix_only=fix_only)
+                    fix_only=fix_only,
+                    session=session)
     elif hasattr(input, 'read'):  # Python 2's file or Python 3's io.IOBase
         # We need to have everything in memory to parse correctly
         content = input.read()
@@ -396,6 +431,7 @@ def run(input,
                     base_path=base_path,
                     skip_suggestions=skip_suggestions,
                     fix=fix,
-                    fix_only=fix_only)
+                    fix_only=fix_only,
+                    session=session)
     else:
         raise TypeError('input should be a string or a stream')
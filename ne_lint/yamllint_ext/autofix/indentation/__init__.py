@@ -1,7 +1,5 @@
 # Copyright © 2023 Dell Inc. or its subsidiaries. All Rights Reserved.
 
-import sys
-
 from ne_lint.yamllint_ext.autofix.utils import filelines
 from ne_lint.yamllint_ext.autofix.indentation.utils import (
     get_yaml_dict,
@@ -22,8 +20,8 @@ def fix_indentation(problem):
                 problem.line)
             for line, correction in sorted(corrections.items()):
                 if line == -1:
-                    print('Unable to autofix indentation for line {}. '
-                          'Unsupported YAML.'.format(problem.line))
-                    sys.exit(1)
+                    raise RuntimeError(
+                        'Unable to autofix indentation for line {}. '
+                        'Unsupported YAML.'.format(problem.line))
                 lines[line - 1] = correction['new']
             problem.fixed = True
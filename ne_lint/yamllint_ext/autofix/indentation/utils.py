@@ -3,21 +3,34 @@
 import re
 import yaml
 from io import StringIO
+from functools import lru_cache
 
+from ne_lint.yamllint_ext.backends import get_safe_loader
 from ne_lint.yamllint_ext.autofix.indentation.constants import (
     INSTRINSIC_FUNCTIONS
 )
 
 
-class ExtLoader(yaml.SafeLoader):
+class ExtLoaderMixin(object):
     def construct_mapping(self, node, deep=False):
-        mapping = super(ExtLoader, self).construct_mapping(
+        mapping = super(ExtLoaderMixin, self).construct_mapping(
             node, deep=deep)
         # Add 1 so line numbering starts at 1
         # mapping['__line__'] = node.start_mark.line + 1
         return mapping
 
 
+@lru_cache(maxsize=None)
+def make_ext_loader(loader):
+    return type('ExtLoader', (ExtLoaderMixin, loader), {})
+
+
+def get_ext_loader():
+    """Return the loader of the backend in use, see backends.get_backend().
+    """
+    return make_ext_loader(get_safe_loader())
+
+
 def repr_str(dumper, data):
     if '\n' in data:
         return dumper.represent_scalar(
@@ -61,7 +74,7 @@ def get_file_content(path):
 
 def get_yaml_dict(path):
     f = open(path)
-    content = yaml.load(f, ExtLoader)
+    content = yaml.load(f, get_ext_loader())
     f.close()
     return content
 
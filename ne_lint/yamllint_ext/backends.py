@@ -0,0 +1,150 @@
+# Copyright © 2023 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+import os
+import yaml
+from yaml.error import Mark
+
+LIBYAML = 'libyaml'
+PYTHON = 'python'
+BACKEND_ENV = 'NE_LINT_YAML_BACKEND'
+# libyaml does not count a byte order mark in the mark indexes.
+BOM = '\ufeff'
+
+try:
+    from yaml import CSafeLoader
+except ImportError:
+    CSafeLoader = None
+
+_backend = None
+
+
+def libyaml_available():
+    return CSafeLoader is not None
+
+
+def get_backend():
+    """Return the name of the loader backend in use.
+
+    libyaml is used when PyYAML was built with it, unless the
+    NE_LINT_YAML_BACKEND environment variable asks for "python".
+    """
+    global _backend
+    if _backend is None:
+        requested = os.environ.get(BACKEND_ENV, '').lower()
+        if requested == PYTHON or not libyaml_available():
+            _backend = PYTHON
+        else:
+            _backend = LIBYAML
+    return _backend
+
+
+def set_backend(name):
+    """Force a backend, or reset to the default when name is None."""
+    global _backend
+    if name == LIBYAML and not libyaml_available():
+        raise ValueError('libyaml is not available in this PyYAML build.')
+    if name not in (None, LIBYAML, PYTHON):
+        raise ValueError('no such yaml backend: "{}"'.format(name))
+    _backend = name
+
+
+def get_safe_loader():
+    if get_backend() == LIBYAML:
+        return CSafeLoader
+    return yaml.SafeLoader
+
+
+def safe_load(stream):
+    return yaml.load(stream, Loader=get_safe_loader())
+
+
+def scan(buffer):
+    """Scan a buffer into a list of tokens.
+
+    With libyaml the marks are rebuilt so that they carry the buffer and
+    pointer like the marks of the pure Python scanner. Any scanner error,
+    or a buffer that libyaml counts differently, is left to the Python
+    scanner, so that messages and positions stay the same.
+
+    :param buffer: The blueprint content.
+    :return: A list of yaml.tokens.Token.
+    """
+    if get_backend() == LIBYAML and isinstance(buffer, str) and \
+            not buffer.startswith(BOM):
+        try:
+            return _scan(CSafeLoader(buffer), buffer)
+        except yaml.error.YAMLError:
+            pass
+    return _scan(yaml.SafeLoader(buffer))
+
+
+def compose_single(buffer):
+    """Compose a single document buffer with libyaml.
+
+    :param buffer: The blueprint content.
+    :return: A tuple of a flag and the root node. The flag is False when
+        libyaml is not in use or failed, in which case the caller composes
+        the document itself and reports the errors of the Python parser.
+    """
+    if get_backend() == LIBYAML and isinstance(buffer, str) and \
+            not buffer.startswith(BOM):
+        try:
+            root = CSafeLoader(buffer).get_single_node()
+        except yaml.error.YAMLError:
+            return False, None
+        if root is not None:
+            _remark_nodes(root, buffer)
+        return True, root
+    return False, None
+
+
+def _scan(yaml_loader, buffer=None):
+    tokens = []
+    token = yaml_loader.get_token()
+    while token is not None:
+        tokens.append(token)
+        token = yaml_loader.get_token()
+    if buffer is not None:
+        _remark_tokens(tokens, buffer)
+    return tokens
+
+
+def _python_mark(mark, buffer):
+    return Mark(mark.name,
+                mark.index,
+                mark.line,
+                mark.column,
+                buffer,
+                mark.index)
+
+
+def _remark_tokens(tokens, buffer):
+    buffer = buffer + '\0'
+    for token in tokens:
+        token.start_mark = _python_mark(token.start_mark, buffer)
+        token.end_mark = _python_mark(token.end_mark, buffer)
+        if isinstance(token, yaml.tokens.ScalarToken) and not token.style:
+            # libyaml reports plain scalars with an empty style.
+            token.style = None
+
+
+def _remark_nodes(root, buffer):
+    buffer = buffer + '\0'
+    seen = set()
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if id(node) in seen:
+            continue
+        seen.add(id(node))
+        node.start_mark = _python_mark(node.start_mark, buffer)
+        node.end_mark = _python_mark(node.end_mark, buffer)
+        if isinstance(node, yaml.nodes.ScalarNode):
+            if not node.style:
+                node.style = None
+        elif isinstance(node, yaml.nodes.SequenceNode):
+            stack.extend(node.value)
+        elif isinstance(node, yaml.nodes.MappingNode):
+            for key, value in node.value:
+                stack.append(key)
+                stack.append(value)
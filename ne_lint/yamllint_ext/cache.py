@@ -0,0 +1,751 @@
+# Copyright © 2023 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+import os
+import sys
+import json
+import time
+import zlib
+import marshal
+import hashlib
+import functools
+import tempfile
+import threading
+import contextvars
+import urllib.error
+from concurrent.futures import Future
+from contextlib import contextmanager
+from collections import namedtuple, OrderedDict
+
+from ne_lint.logger import logger
+from ne_lint.yamllint_ext import http_client
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import sqlite3
+except ImportError:
+    sqlite3 = None
+
+CACHE_DIR_ENV = 'NE_LINT_CACHE_DIR'
+CACHE_MAX_SIZE_ENV = 'NE_LINT_CACHE_MAX_SIZE'
+DEFAULT_CACHE_MAX_SIZE = 512 * 1024 * 1024
+LOCK_SUFFIX = '.lock'
+STORE_NAME = 'cache.sqlite'
+STORE_FORMAT = 3
+DOCUMENTS_DIR = 'documents'
+# The most bytes of parsed documents kept in memory by a process.
+DOCUMENTS_MEMORY = 64 * 1024 * 1024
+# An entry is marked as used at most once in this many seconds, so that
+# most reads do not write to the store.
+ACCESS_RESOLUTION = 3600
+
+# What was fetched, when, and the validators to revalidate it with.
+CacheEntry = namedtuple(
+    'CacheEntry', ['value', 'fetched', 'etag', 'last_modified'])
+# An entry is fresh for ttl seconds. After that, and up to max_stale
+# seconds, it is still used, and refreshed later, see refresh_later().
+Layer = namedtuple('Layer', ['name', 'ttl', 'max_stale'])
+
+# A plugin name rarely changes its id, and a release is never changed
+# once published, new versions are listed every now and then.
+PLUGIN_IDS = Layer('plugin_ids', 7 * 86400, 30 * 86400)
+PLUGIN_VERSIONS = Layer('plugin_versions', 86400, 7 * 86400)
+RELEASE_SPECS = Layer('release_specs', 30 * 86400, 90 * 86400)
+IMPORTS = Layer('imports', 86400, 7 * 86400)
+# The most refreshes that run at once, see run_refreshes().
+REFRESH_WORKERS = 8
+
+stores = {}
+stores_lock = threading.Lock()
+document_caches = {}
+# The refreshes of stale entries that were put off, by what they
+# refresh, see refresh_later().
+pending_refreshes = OrderedDict()
+pending_refreshes_lock = threading.Lock()
+
+
+def get_cache_root():
+    """Return the directory to cache in.
+
+    This is $NE_LINT_CACHE_DIR, or else ne-lint in $XDG_CACHE_HOME or
+    ~/.cache.
+    """
+    root = os.environ.get(CACHE_DIR_ENV)
+    if not root:
+        root = os.path.join(
+            os.environ.get('XDG_CACHE_HOME') or
+            os.path.join(os.path.expanduser('~'), '.cache'),
+            'ne-lint')
+    return root
+
+
+def get_cache_max_size():
+    """Return the most bytes to cache, from $NE_LINT_CACHE_MAX_SIZE."""
+    try:
+        return int(os.environ[CACHE_MAX_SIZE_ENV])
+    except (KeyError, ValueError):
+        return DEFAULT_CACHE_MAX_SIZE
+
+
+def read_json(path):
+    """Return the JSON document of a cache file, marking it as used.
+
+    The access time of a file is when it was last used, see evict().
+    """
+    return json.loads(read_bytes(path))
+
+
+def read_bytes(path):
+    """Return the content of a cache file, marking it as used."""
+    with open(path, 'rb') as f:
+        content = f.read()
+    try:
+        os.utime(path, (time.time(), os.stat(path).st_mtime))
+    except OSError:
+        pass
+    return content
+
+
+def write_json(path, value):
+    """Write a JSON cache file atomically, see write_bytes()."""
+    write_bytes(path, json.dumps(value).encode('utf-8'))
+
+
+def write_bytes(path, content):
+    """Write a cache file atomically.
+
+    The file is written next to its path and renamed over it, so that
+    readers see the old file or the new one but never a part of it.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+            'wb', dir=directory, delete=False) as f:
+        f.write(content)
+    try:
+        os.replace(f.name, path)
+    except OSError:
+        os.remove(f.name)
+        raise
+
+
+@contextmanager
+def lock(path):
+    """Hold an advisory lock on a cache file, where the platform has one.
+
+    Holding it while fetching an item makes other lints of the same item,
+    in other processes and threads, wait and read what was cached instead
+    of fetching it again.
+    """
+    if fcntl is None:
+        yield
+        return
+    try:
+        os.makedirs(os.path.dirname(str(path)), exist_ok=True)
+        f = open(str(path) + LOCK_SUFFIX, 'a')
+    except OSError:
+        yield
+        return
+    with f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def evict(root, max_size=None):
+    """Remove the least recently used cache files over the size limit.
+
+    The entries of the SQLite store count, and are removed, one by one.
+
+    :param root: The cache directory.
+    :param max_size: The most bytes to keep, see get_cache_max_size().
+    """
+    max_size = get_cache_max_size() if max_size is None else max_size
+    store = open_store(root)
+    items = []
+    size = 0
+    for directory, _, names in os.walk(root):
+        for name in names:
+            if name.endswith(LOCK_SUFFIX) or name.startswith(STORE_NAME):
+                continue
+            path = os.path.join(directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            items.append((stat.st_atime, stat.st_size, path, False))
+            size += stat.st_size
+    if isinstance(store, SqliteStore):
+        for key, accessed, entry_size in store.usage():
+            items.append((accessed, entry_size, key, True))
+            size += entry_size
+    items.sort()
+    keys = []
+    for _, item_size, item, is_entry in items:
+        if size <= max_size:
+            break
+        if is_entry:
+            keys.append(item)
+        else:
+            try:
+                os.remove(item)
+            except OSError:
+                continue
+        size -= item_size
+    if keys:
+        store.delete(keys)
+
+
+class SingleFlight(object):
+    """Share a call among the threads that make it at the same time.
+
+    The first thread to call with a key runs the function, the threads
+    that call with the same key while it runs wait for it and get its
+    result, or its exception.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, function):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = Future()
+        if not leader:
+            return call.result()
+        try:
+            result = function()
+        except BaseException as e:
+            call.set_exception(e)
+            raise
+        else:
+            call.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+
+def is_fresh(entry, seconds, now=None):
+    """Whether an entry was fetched less than some seconds ago."""
+    now = time.time() if now is None else now
+    return entry.fetched <= now < entry.fetched + seconds
+
+
+def format_age(entry, now=None):
+    """Return how long ago an entry was fetched, e.g. '3 days'."""
+    seconds = max(0, (now or time.time()) - entry.fetched)
+    for unit, size in [('day', 86400), ('hour', 3600), ('minute', 60)]:
+        if seconds >= size:
+            count = int(seconds // size)
+            return '{} {}{}'.format(count, unit, 's' if count > 1 else '')
+    return '{} seconds'.format(int(seconds))
+
+
+def get_validator_headers(entry):
+    """Return the request headers that revalidate a CacheEntry, if any.
+
+    :param entry: A CacheEntry, or None.
+    """
+    headers = {}
+    if entry and entry.etag:
+        headers['If-None-Match'] = entry.etag
+    if entry and entry.last_modified:
+        headers['If-Modified-Since'] = entry.last_modified
+    return headers
+
+
+def make_entry(response, load, fetched, entry=None):
+    """Return the CacheEntry of a response.
+
+    :param response: An http_client.Response.
+    :param load: A function that returns the value of a response body.
+    :param fetched: When the response was requested.
+    :param entry: The CacheEntry that was revalidated, if any. A 304
+        response renews it, with its value and validators.
+    """
+    if response.status == 304 and entry:
+        value = entry.value
+    else:
+        value = load(response.body)
+    return CacheEntry(
+        value,
+        fetched,
+        response.headers.get('ETag', entry and entry.etag),
+        response.headers.get('Last-Modified', entry and entry.last_modified))
+
+
+def refresh_later(key, refresh):
+    """Put off refreshing a stale entry until run_refreshes().
+
+    The lint command runs the refreshes once every blueprint is linted,
+    so that they do not hold up the lints. The workers of a process pool
+    send theirs to the parent with what they lint, see take_refreshes(),
+    so refresh must be picklable there.
+
+    :param key: What is refreshed. It is refreshed once, however often
+        it is put off.
+    :param refresh: A function that fetches it and caches it.
+    """
+    with pending_refreshes_lock:
+        pending_refreshes.setdefault(key, refresh)
+
+
+def take_refreshes():
+    """Return the refreshes that were put off as (key, refresh), and
+    forget them.
+    """
+    with pending_refreshes_lock:
+        refreshes = list(pending_refreshes.items())
+        pending_refreshes.clear()
+    return refreshes
+
+
+def run_refreshes(timeout=None):
+    """Run the refreshes that were put off, in a pool of threads.
+
+    The refreshes that they put off are run too. The entries are written
+    atomically, so a refresh that is cut short when Python exits leaves
+    the cache as it was.
+
+    :param timeout: The longest to wait for them, or None to wait until
+        they are done.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    done = set()
+
+    def run():
+        while True:
+            with pending_refreshes_lock:
+                if not pending_refreshes:
+                    return
+                key, refresh = pending_refreshes.popitem(last=False)
+                if key in done:
+                    continue
+                done.add(key)
+            try:
+                refresh()
+            except Exception as e:
+                logger.debug(f'Failed to refresh {key}: {e}')
+
+    # The refreshes are made with the network settings of the caller.
+    threads = [threading.Thread(target=contextvars.copy_context().run,
+                                args=(run,),
+                                name='ne-lint-refresh',
+                                daemon=True)
+               for _ in range(REFRESH_WORKERS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        if deadline is None:
+            thread.join()
+        else:
+            thread.join(max(0, deadline - time.monotonic()))
+
+
+def open_store(root):
+    """Return the store of a cache directory.
+
+    This is a SqliteStore, or a FileStore where Python has no sqlite3. It
+    is shared by the threads of the process.
+    """
+    root = str(root)
+    with stores_lock:
+        if root not in stores:
+            if sqlite3 is None:
+                stores[root] = FileStore(os.path.join(root, '__entries'))
+            else:
+                stores[root] = SqliteStore(os.path.join(root, STORE_NAME))
+        return stores[root]
+
+
+def open_documents(root):
+    """Return the DocumentCache of a cache directory.
+
+    It is shared by the threads of the process.
+    """
+    root = str(root)
+    with stores_lock:
+        if root not in document_caches:
+            document_caches[root] = DocumentCache(
+                os.path.join(root, DOCUMENTS_DIR))
+        return document_caches[root]
+
+
+def dump_value(value):
+    """Return a cached value in the binary form of the cache.
+
+    :raises ValueError: If the value has types that marshal cannot keep.
+    """
+    return zlib.compress(marshal.dumps(value), 1)
+
+
+def load_value(content):
+    return marshal.loads(zlib.decompress(content))
+
+
+def entry_key(layer, key):
+    return hashlib.sha256(
+        '{}\0{}'.format(layer, key).encode('utf-8')).hexdigest()
+
+
+class DocumentCache(object):
+    """Parsed YAML files, kept in the binary form of the cache.
+
+    A file is cached by its path, modification time and size, so that an
+    edited file is parsed again. The parsed files are kept in files under
+    root for other processes, and the most recently used in memory.
+    Every load returns a copy of its own.
+
+    :param root: The directory to keep the files in.
+    :param max_memory: The most bytes to keep in memory.
+    """
+
+    def __init__(self, root, max_memory=DOCUMENTS_MEMORY):
+        self.root = root
+        self.max_memory = max_memory
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._memory_size = 0
+
+    def load(self, path, parse):
+        """Return a parsed file.
+
+        :param path: The path of the file.
+        :param parse: A function that parses the file at a path.
+        """
+        try:
+            key = self.key(path)
+        except OSError:
+            return parse(path)
+        content = self._get(key)
+        if content is not None:
+            try:
+                return load_value(content)
+            except (zlib.error, ValueError, EOFError, TypeError) as e:
+                logger.debug(f'Not reading from cache: {path}: {e}')
+        value = parse(path)
+        try:
+            content = dump_value(value)
+        except ValueError:
+            return value
+        self._put(key, content)
+        try:
+            write_bytes(self._path(key), content)
+        except OSError as e:
+            logger.debug(f'Not pushing to cache: {path}: {e}')
+        return value
+
+    @staticmethod
+    def key(path):
+        """Return the key of a file, which changes when the file does.
+
+        The marshal format is part of the key, as it changes between
+        Python versions.
+        """
+        path = os.path.realpath(path)
+        stat = os.stat(path)
+        return hashlib.sha256('{}\0{}\0{}\0{}\0{}'.format(
+            path,
+            stat.st_mtime_ns,
+            stat.st_size,
+            marshal.version,
+            sys.version_info[:2]).encode('utf-8')).hexdigest()
+
+    def _get(self, key):
+        with self._lock:
+            content = self._memory.get(key)
+            if content is not None:
+                self._memory.move_to_end(key)
+                return content
+        try:
+            content = read_bytes(self._path(key))
+        except OSError:
+            return
+        self._put(key, content)
+        return content
+
+    def _put(self, key, content):
+        if len(content) > self.max_memory:
+            return
+        with self._lock:
+            if key in self._memory:
+                return
+            self._memory[key] = content
+            self._memory_size += len(content)
+            while self._memory_size > self.max_memory:
+                _, evicted = self._memory.popitem(last=False)
+                self._memory_size -= len(evicted)
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], key + '.marshal')
+
+
+class FileStore(object):
+    """Cache entries kept as JSON files, one directory per layer.
+
+    :param root: The directory to keep the files in.
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    def get(self, layer, key):
+        """Return the CacheEntry of a key, or None if there is none."""
+        try:
+            return CacheEntry(**read_json(self._path(layer, key)))
+        except (OSError, ValueError, TypeError):
+            return
+
+    def put(self, layer, key, entry, ttl=None):
+        path = self._path(layer, key)
+        try:
+            write_json(path, entry._asdict())
+        except (OSError, TypeError):
+            logger.debug(f'Not pushing to cache: {path}')
+
+    def digest(self, layer, key):
+        """Return the digest of the value of a key, or None."""
+        try:
+            with open(self._path(layer, key), 'rb') as f:
+                return hashlib.sha256(f.read()).hexdigest()
+        except OSError:
+            return
+
+    def _path(self, layer, key):
+        return os.path.join(self.root, layer, entry_key(layer, key) + '.json')
+
+
+class SqliteStore(object):
+    """Cache entries kept in one SQLite database.
+
+    An entry is keyed by the digest of its layer and key. Its value is
+    kept in a compressed binary form, see dump_value(), which loads much
+    faster than JSON, next to the digest of that form, when it was
+    fetched, and its TTL and validators.
+
+    Every thread uses its own connection. Errors of the database are
+    logged and taken as a cache miss.
+
+    :param path: The database file.
+    """
+
+    SCHEMA = [
+        'CREATE TABLE entries ('
+        ' key TEXT PRIMARY KEY,'
+        ' layer TEXT NOT NULL,'
+        ' name TEXT NOT NULL,'
+        ' fetched REAL NOT NULL,'
+        ' ttl REAL,'
+        ' etag TEXT,'
+        ' last_modified TEXT,'
+        ' accessed REAL NOT NULL,'
+        ' digest TEXT NOT NULL,'
+        ' payload BLOB NOT NULL)',
+        'CREATE INDEX entries_accessed ON entries (accessed)',
+    ]
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def __reduce__(self):
+        # Another process connects on its own.
+        return SqliteStore, (self.path,)
+
+    def get(self, layer, key):
+        """Return the CacheEntry of a key, or None if there is none."""
+        try:
+            connection = self._connect()
+            row = connection.execute(
+                'SELECT payload, fetched, etag, last_modified, accessed '
+                'FROM entries WHERE key = ?',
+                (entry_key(layer, key),)).fetchone()
+            if row is None:
+                return
+            payload, fetched, etag, last_modified, accessed = row
+            value = load_value(payload)
+            now = time.time()
+            if accessed + ACCESS_RESOLUTION < now:
+                connection.execute(
+                    'UPDATE entries SET accessed = ? WHERE key = ?',
+                    (now, entry_key(layer, key)))
+        except (sqlite3.Error,
+                zlib.error,
+                ValueError,
+                EOFError,
+                TypeError) as e:
+            logger.debug(f'Not reading from cache: {self.path}: {e}')
+            return
+        return CacheEntry(value, fetched, etag, last_modified)
+
+    def put(self, layer, key, entry, ttl=None):
+        """Store the CacheEntry of a key.
+
+        :param ttl: The seconds that the entry is fresh for.
+        """
+        try:
+            payload = dump_value(entry.value)
+            self._connect().execute(
+                'INSERT OR REPLACE INTO entries VALUES '
+                '(?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (entry_key(layer, key),
+                 layer,
+                 key,
+                 entry.fetched,
+                 ttl,
+                 entry.etag,
+                 entry.last_modified,
+                 time.time(),
+                 hashlib.sha256(payload).hexdigest(),
+                 payload))
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            logger.debug(f'Not pushing to cache: {self.path}: {e}')
+
+    def digest(self, layer, key):
+        """Return the digest of the value of a key, or None."""
+        try:
+            row = self._connect().execute(
+                'SELECT digest FROM entries WHERE key = ?',
+                (entry_key(layer, key),)).fetchone()
+        except sqlite3.Error:
+            return
+        return row and row[0]
+
+    def usage(self):
+        """Return the key, last use and size of every entry."""
+        try:
+            return self._connect().execute(
+                'SELECT key, accessed, length(payload) FROM entries'
+            ).fetchall()
+        except sqlite3.Error:
+            return []
+
+    def delete(self, keys):
+        try:
+            connection = self._connect()
+            connection.executemany('DELETE FROM entries WHERE key = ?',
+                                   [(key,) for key in keys])
+            connection.execute('PRAGMA incremental_vacuum')
+        except sqlite3.Error as e:
+            logger.debug(f'Not deleting from cache: {self.path}: {e}')
+
+    def _connect(self):
+        connection = getattr(self._local, 'connection', None)
+        # A forked process opens its own connection.
+        if connection is not None and self._local.pid == os.getpid():
+            return connection
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        connection = sqlite3.connect(
+            self.path, timeout=30, isolation_level=None)
+        connection.execute('PRAGMA journal_mode = WAL')
+        self._create(connection)
+        self._local.connection = connection
+        self._local.pid = os.getpid()
+        return connection
+
+    def _create(self, connection):
+        def is_current():
+            return connection.execute(
+                'PRAGMA user_version').fetchone()[0] == STORE_FORMAT
+
+        if is_current():
+            return
+        connection.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            if not is_current():
+                connection.execute('DROP TABLE IF EXISTS entries')
+                for statement in self.SCHEMA:
+                    connection.execute(statement)
+                connection.execute(
+                    'PRAGMA user_version = {}'.format(STORE_FORMAT))
+            connection.execute('COMMIT')
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+
+
+class MarketplaceCache(object):
+    """Marketplace responses, cached per layer.
+
+    A response is used until the TTL of its layer passes, then it is
+    requested again with the ETag and Last-Modified validators it was
+    sent with, and a 304 response renews it without a body. See
+    get_json() for stale responses.
+
+    :param store: Where the responses are kept, see open_store().
+    :param client: The HttpClient to request with.
+    """
+
+    flight = SingleFlight()
+
+    def __init__(self, store, client=None):
+        self.store = store
+        self.client = client or http_client.get_client()
+
+    def __reduce__(self):
+        # Its refreshes are sent to other processes, see refresh_later(),
+        # where it requests with the client of that process.
+        return MarketplaceCache, (self.store,)
+
+    def get_json(self, layer, key, url):
+        """Return the JSON document of a marketplace URL.
+
+        A document older than the TTL of its layer is returned as it is,
+        and revalidated later, see refresh_later(), until it is max_stale
+        old. Offline, it is returned however old it is.
+
+        :param layer: The Layer that the document belongs to.
+        :param key: What the document is looked up by in its layer.
+        :param url: The URL of the document.
+        :return: The document, or {} if the marketplace does not have it.
+            If it could not be read but is cached, however old, the cached
+            document.
+        :raises http_client.UnavailableError: If the marketplace is out of
+            reach or fails for now, see http_client.as_unavailable(), and
+            the document is not cached.
+        """
+        entry = self.store.get(layer.name, key)
+        if entry and is_fresh(entry, layer.ttl):
+            return entry.value
+        if entry and http_client.get_settings().offline:
+            return entry.value
+        if entry and is_fresh(entry, layer.max_stale):
+            refresh_later(
+                (layer.name, key),
+                functools.partial(self.fetch, layer, key, url, entry))
+            return entry.value
+        return self.flight.do(
+            (self.store, layer.name, key),
+            lambda: self.fetch(layer, key, url, entry))
+
+    def fetch(self, layer, key, url, entry=None):
+        """Request a document and cache it.
+
+        :param entry: The CacheEntry to revalidate, if there is one.
+        """
+        now = time.time()
+        try:
+            response = self.client.request(url, get_validator_headers(entry))
+            entry = make_entry(response, json.loads, now, entry)
+        except (urllib.error.HTTPError, urllib.error.URLError) as e:
+            if entry:
+                logger.warning(f'Failed on URL: {url}: {str(e)}, using the '
+                               f'response cached {format_age(entry)} ago.')
+                return entry.value
+            unavailable = http_client.as_unavailable(url, e)
+            if unavailable:
+                raise unavailable
+            logger.error(f'Failed on URL: {url}: {str(e)}.')
+            return {}
+        self.store.put(layer.name, key, entry, layer.ttl)
+        return entry.value
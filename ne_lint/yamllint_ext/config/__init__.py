@@ -1,8 +1,14 @@
 # Copyright © 2023 Dell Inc. or its subsidiaries. All Rights Reserved.
 
+import json
 import yaml
+import hashlib
 import yamllint.rules
 from ne_lint.yamllint_ext.utils import update_dict_values
+from ne_lint.yamllint_ext.overrides import (
+    LintProblem,
+    spaces_after,
+    spaces_before)
 from yamllint.config import YamlLintConfig
 from yamllint.config import (
     validate_rule_conf,
@@ -20,7 +26,12 @@ class YamlLintConfigExt(YamlLintConfig):
                 DEFAULT_YAMLLINT_CONFIG, content)
             default_config = yaml.dump(updated_dict)
         self._yamllint_rules = yamllint_rules or yamllint.rules
+        self._rule_sets = {}
         super().__init__(default_config, file)
+        # The resolved rules, to tell apart results of different configs.
+        self.digest = hashlib.sha256(
+            json.dumps(self.rules, sort_keys=True, default=str).encode(
+                'utf-8')).hexdigest()
 
     @property
     def yamllint_rules(self):
@@ -36,6 +47,21 @@ class YamlLintConfigExt(YamlLintConfig):
                     filepath is None or 'ignore' not in val or
                     not val['ignore'].match_file(filepath))]
 
+    def rule_set(self, filepath):
+        """Return the enabled rules prepared for linting a file.
+
+        The rule set is built once for every set of enabled rules and
+        reused for every file linted with this configuration.
+
+        :param filepath: The linted file path.
+        :return: A RuleSet.
+        """
+        rules = self.enabled_rules(filepath)
+        key = tuple(rule.ID for rule in rules)
+        if key not in self._rule_sets:
+            self._rule_sets[key] = RuleSet(rules, self.rules)
+        return self._rule_sets[key]
+
     def validate(self):
         for id in self.rules:
             try:
@@ -44,3 +70,46 @@ class YamlLintConfigExt(YamlLintConfig):
                 raise YamlLintConfigError('invalid config: %s' % e)
 
             self.rules[id] = validate_rule_conf(rule, self.rules[id])
+
+
+class RuleSet(object):
+    """Enabled rules, ready for the lint loop.
+
+    The helpers of the rules are bound to the ne-lint overrides, and each
+    rule is paired with its resolved configuration. The token, comment
+    and line rules are split, and the NE rules are indexed by the keys of
+    the sections they check.
+    """
+
+    def __init__(self, rules, rules_conf):
+        self.ids = {rule.ID for rule in rules}
+        # Every token rule gets a fresh context of its own in each run.
+        self.token_rule_ids = [r.ID for r in rules if r.TYPE == 'token']
+        self.token_rules = []
+        self.comment_rules = []
+        self.line_rules = []
+        self.node_rules = {}
+        for rule in rules:
+            bind_helpers(rule)
+            rule_conf = rules_conf[rule.ID]
+            keywords = getattr(rule.check, 'keywords', None)
+            if rule.TYPE == 'token' and keywords:
+                for keyword in keywords:
+                    self.node_rules.setdefault(keyword, []).append(
+                        (rule, rule_conf))
+            elif rule.TYPE == 'token':
+                self.token_rules.append((rule, rule_conf))
+            elif rule.TYPE == 'comment':
+                self.comment_rules.append((rule, rule_conf))
+            elif rule.TYPE == 'line':
+                self.line_rules.append((rule, rule_conf))
+
+
+def bind_helpers(rule):
+    """Make a yamllint rule report through the ne-lint overrides."""
+    if hasattr(rule, 'LintProblem'):
+        rule.LintProblem = LintProblem
+    if hasattr(rule, 'spaces_before'):
+        rule.spaces_before = spaces_before
+    if hasattr(rule, 'spaces_after'):
+        rule.spaces_after = spaces_after
@@ -3,6 +3,8 @@
 UNUSED_INPUTS = 'unused_inputs'
 UNUSED_IMPORT = 'node_types_by_plugin'
 UNUSED_IMPORT_CTX = 'imported_node_types_by_plugin'
+# The plugin imports of every imported node type, see UNUSED_IMPORT_CTX.
+PLUGINS_BY_NODE_TYPE = 'plugins_by_node_type'
 
 BLUEPRINT_MODEL = {
     'tosca_definitions_version': None,
@@ -2,6 +2,7 @@
 
 import yaml
 
+from ne_lint.yamllint_ext import backends
 from yamllint.parser import (
     Token,
     line_generator,
@@ -140,14 +141,180 @@ def generate_nodes_recursively(node):
                 yield from generate_nodes_recursively(sub)
 
 
-def node_generator(buffer):
+class ReplayLoader(SafeLineLoader):
+    """A SafeLineLoader that reads a list of already scanned tokens.
+
+    The parser and the composer work as usual, but they never touch the
+    buffer again.
+    """
+
+    def __init__(self, tokens):
+        super(ReplayLoader, self).__init__('')
+        self._replay_tokens = tokens
+        self._replay_index = 0
+
+    def check_token(self, *choices):
+        if self._replay_index >= len(self._replay_tokens):
+            return False
+        if not choices:
+            return True
+        token = self._replay_tokens[self._replay_index]
+        return isinstance(token, choices)
+
+    def peek_token(self):
+        if self._replay_index < len(self._replay_tokens):
+            return self._replay_tokens[self._replay_index]
+
+    def get_token(self):
+        if self._replay_index < len(self._replay_tokens):
+            token = self._replay_tokens[self._replay_index]
+            self._replay_index += 1
+            return token
+
+
+class ParsedBlueprint(object):
+
+    def __init__(self, buffer):
+        """Parse a blueprint buffer once for all of the lint phases.
+
+        The buffer is scanned a single time. The node tree, the constructed
+        data and the syntax error are all derived from those tokens. When
+        the scanner fails, every consumer falls back to reading the buffer
+        on its own, so that broken documents are reported as before.
+
+        :param buffer: The blueprint content.
+        """
+        self.buffer = buffer
+        self._lines = None
+        self._parsed = False
+        self._tokens = None
+        self._root = None
+        self._node_error = None
+        self._syntax_error = None
+        self._data = None
+        self._data_error = None
+        self._constructed = False
+
+    @property
+    def lines(self):
+        if self._lines is None:
+            self._lines = list(line_generator(self.buffer))
+        return self._lines
+
+    @property
+    def tokens(self):
+        """The scanned tokens, or None if the scanner failed."""
+        self._parse()
+        return self._tokens
+
+    @property
+    def root(self):
+        self._parse()
+        if self._node_error:
+            raise self._node_error
+        return self._root
+
+    @property
+    def data(self):
+        self._parse()
+        if self._tokens is None:
+            return yaml.safe_load(self.buffer)
+        if self._data_error:
+            raise self._data_error
+        if not self._constructed:
+            self._data = self._construct()
+            self._constructed = True
+        return self._data
+
+    def check_syntax(self):
+        """Raise the first syntax error of the document, if any."""
+        self._parse()
+        if self._tokens is None:
+            list(yaml.parse(self.buffer, Loader=yaml.BaseLoader))
+        elif self._syntax_error:
+            raise self._syntax_error
+
+    def _parse(self):
+        if self._parsed:
+            return
+        self._parsed = True
+        try:
+            self._tokens = backends.scan(self.buffer)
+        except yaml.scanner.ScannerError:
+            return
+        self._compose()
+
+    def _compose(self):
+        composed, self._root = backends.compose_single(self.buffer)
+        if composed:
+            # libyaml read the whole stream, it holds a single document.
+            return
+        yaml_loader = ReplayLoader(self._tokens)
+        try:
+            if yaml_loader.check_node():
+                self._root = yaml_loader.get_node()
+        except yaml.composer.ComposerError as e:
+            # The parser is still in a good state, keep looking for
+            # syntax errors in the rest of the stream.
+            self._node_error = e
+            self._data_error = e
+        except yaml.error.MarkedYAMLError as e:
+            self._node_error = e
+            self._data_error = e
+            self._syntax_error = e
+            return
+
+        try:
+            if not self._data_error and \
+                    not yaml_loader.check_event(yaml.events.StreamEndEvent):
+                self._data_error = yaml.composer.ComposerError(
+                    'expected a single document in the stream',
+                    self._root.start_mark,
+                    'but found another document',
+                    yaml_loader.peek_event().start_mark)
+            while yaml_loader.check_event():
+                yaml_loader.get_event()
+        except yaml.error.MarkedYAMLError as e:
+            self._syntax_error = e
+            self._data_error = self._data_error or e
+
+    def _construct(self):
+        if self._root is None:
+            return
+        root = self._root
+        if self._has_merge_keys():
+            # Merge keys are flattened in place by the constructor. The rules
+            # need to see them, so construct from a tree of our own.
+            composed, root = backends.compose_single(self.buffer)
+            if not composed:
+                root = ReplayLoader(self._tokens).get_single_node()
+        return yaml.SafeLoader('').construct_document(root)
+
+    def _has_merge_keys(self):
+        for token in self._tokens:
+            if isinstance(token, yaml.tokens.ScalarToken) and \
+                    token.value == '<<':
+                return True
+        return False
+
+
+def node_generator(buffer, parsed=None):
+    if parsed is not None and parsed.tokens is not None:
+        root = parsed.root
+        if root is None:
+            return
+        yield from generate_nodes_recursively(root.value)
+        return
     yaml_loader = SafeLineLoader(buffer)
     if not yaml_loader.check_node():
         return
     yield from generate_nodes_recursively(yaml_loader.get_node().value)
 
 
-def token_or_comment_generator(buffer):
+def token_or_comment_generator(buffer, parsed=None):
+    if parsed is not None and parsed.tokens is not None:
+        yield from _replay_token_or_comment_generator(parsed.tokens)
+        return
     yaml_loader = SafeLineLoader(buffer)
 
     try:
@@ -172,6 +339,23 @@ def token_or_comment_generator(buffer):
         pass
 
 
+def _replay_token_or_comment_generator(tokens):
+    stack = []
+    prev = None
+    last = len(tokens) - 1
+    for index, curr in enumerate(tokens):
+        next = tokens[index + 1] if index < last else None
+        nextnext = tokens[index + 2] if index + 1 < last else None
+
+        yield NEToken(
+            curr.start_mark.line + 1, curr, prev, next, nextnext, stack)
+
+        for comment in comments_between_tokens(curr, next):
+            yield comment
+
+        prev = curr
+
+
 class YamlParserLintProblem():
     def __init__(self, line, column, desc):
         self.line = line
@@ -179,13 +363,14 @@ class YamlParserLintProblem():
         self.desc = desc
 
 
-def token_or_comment_or_line_generator(buffer):
+def token_or_comment_or_line_generator(buffer, parsed=None):
     """Generator that mixes tokens and lines, ordering them by line number"""
 
+    parsed = parsed or ParsedBlueprint(buffer)
     latest_token = None
-    tok_or_com_gen = token_or_comment_generator(buffer)
-    line_gen = line_generator(buffer)
-    node_gen = node_generator(buffer)
+    tok_or_com_gen = token_or_comment_generator(buffer, parsed)
+    line_gen = iter(parsed.lines)
+    node_gen = node_generator(buffer, parsed)
 
     tok_or_com = next(tok_or_com_gen, None)
     if tok_or_com:
@@ -0,0 +1,436 @@
+# Copyright © 2023 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+import os
+import ssl
+import gzip
+import base64
+import json
+import time
+import threading
+import http.client
+import contextlib
+import contextvars
+import urllib.error
+import urllib.request
+from collections import namedtuple
+from urllib.parse import unquote, urljoin, urlparse
+
+from ne_lint.logger import logger
+
+DEFAULT_TIMEOUT = 10
+# The seconds that the requests of a lint may take in all.
+DEFAULT_DEADLINE = 120
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+# The longest a Retry-After header makes us wait.
+MAX_RETRY_AFTER = 10
+MAX_REDIRECTS = 5
+MAX_IDLE_CONNECTIONS = 8
+RETRY_STATUSES = [429, 500, 502, 503, 504]
+REDIRECT_STATUSES = [301, 302, 303, 307, 308]
+USER_AGENT = 'ne-lint'
+# A host that fails this many requests in a row is not requested again
+# until the cool-down passes.
+FAILURE_THRESHOLD = 5
+COOLDOWN = 60
+
+Response = namedtuple('Response', ['url', 'status', 'headers', 'body'])
+
+
+class UnavailableError(urllib.error.URLError):
+    """A request was not sent, or failed, because its host or the network
+    is out of reach for now."""
+
+
+def as_unavailable(url, error):
+    """Return a failed request as UnavailableError if it may succeed later.
+
+    Connection errors, timeouts, 429 and 5xx statuses may pass, other
+    statuses, like a 404, are an answer.
+
+    :param url: The URL that was requested.
+    :param error: The urllib.error.URLError it failed with.
+    :return: An UnavailableError, or None.
+    """
+    if isinstance(error, UnavailableError):
+        return error
+    if isinstance(error, urllib.error.HTTPError) and \
+            error.code not in RETRY_STATUSES:
+        return
+    unavailable = UnavailableError(
+        '{} could not be requested: {}'.format(url, error))
+    unavailable.__cause__ = error
+    return unavailable
+
+
+class OfflineError(UnavailableError):
+    """A request was made while the client is offline."""
+
+
+class NetworkSettings(object):
+    """The network settings of a lint.
+
+    Every lint, or thread, uses the settings that it made active, so
+    lints in other threads do not see each other's settings. Threads
+    that a lint starts need to make its settings active themselves.
+
+    :param offline: Whether to fail every request with OfflineError.
+    :param timeout: The seconds to wait to connect and for every read, or
+        None for the timeout of the client.
+    :param deadline: The seconds from now that requests may take in all,
+        or None to not limit them.
+    """
+
+    def __init__(self, offline=False, timeout=None, deadline=None):
+        self.offline = offline
+        self.timeout = timeout
+        self.deadline = None
+        if deadline is not None:
+            self.deadline = time.monotonic() + deadline
+
+    def remaining(self):
+        """Return the seconds left until the deadline, or None."""
+        if self.deadline is not None:
+            return max(0, self.deadline - time.monotonic())
+
+    @contextlib.contextmanager
+    def active(self):
+        """Make these the settings of the requests in this context."""
+        token = _current_settings.set(self)
+        try:
+            yield self
+        finally:
+            _current_settings.reset(token)
+
+
+_current_settings = contextvars.ContextVar('ne_lint_network')
+_default_settings = NetworkSettings()
+
+
+def get_settings():
+    """Return the network settings of the current lint.
+
+    Outside of a lint these are the defaults, online and without a
+    deadline.
+    """
+    return _current_settings.get(_default_settings)
+
+
+class CircuitBreaker(object):
+    """Stops requests to hosts that keep failing.
+
+    Once a host fails threshold requests in a row, its requests are not
+    sent until the cool-down passes. Then one request is let through, and
+    the host is requested again if it succeeds, or waited on for another
+    cool-down if it fails.
+
+    :param threshold: The failures in a row that open the circuit.
+    :param cooldown: The seconds to wait before trying the host again.
+    """
+
+    def __init__(self, threshold=FAILURE_THRESHOLD, cooldown=COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._failures = {}
+        self._opened = {}
+
+    def allow(self, host):
+        """Return whether to send a request to a host."""
+        with self._lock:
+            opened = self._opened.get(host)
+            if opened is None:
+                return True
+            if time.monotonic() - opened < self.cooldown:
+                return False
+            # Let one request through, and wait for it.
+            self._opened[host] = time.monotonic()
+            return True
+
+    def success(self, host):
+        with self._lock:
+            self._failures.pop(host, None)
+            self._opened.pop(host, None)
+
+    def failure(self, host):
+        with self._lock:
+            failures = self._failures.get(host, 0) + 1
+            self._failures[host] = failures
+            if failures < self.threshold:
+                return
+            if host not in self._opened:
+                logger.warning(
+                    f'{host} failed {failures} requests in a row, not '
+                    f'requesting it for {self.cooldown} seconds.')
+            self._opened[host] = time.monotonic()
+
+    def reset(self):
+        with self._lock:
+            self._failures = {}
+            self._opened = {}
+
+
+class HttpClient(object):
+    """A HTTP client that keeps its connections alive between requests.
+
+    Idle connections are kept per host and reused by the next request to
+    that host, from any thread. All HTTPS connections share one SSL
+    context. Responses are requested gzip encoded, and requests that
+    fail on a connection error or a 429 or 5xx status are retried with an
+    exponential backoff.
+
+    Errors are raised as urllib.error.HTTPError and urllib.error.URLError,
+    like urllib.request.urlopen does.
+
+    :param timeout: The seconds to wait to connect and for every read.
+    :param retries: The times to retry a failed request.
+    :param backoff: The seconds to wait before the first retry, doubled
+        for every other retry.
+
+    The client is shared by every lint in the process, and reads the
+    offline flag, the timeout and the deadline of a request from the
+    NetworkSettings of the lint that makes it. Offline, every request
+    raises OfflineError. Requests to a host that keeps failing, see
+    CircuitBreaker, and requests after the deadline raise
+    UnavailableError.
+    """
+
+    def __init__(self,
+                 timeout=DEFAULT_TIMEOUT,
+                 retries=DEFAULT_RETRIES,
+                 backoff=DEFAULT_BACKOFF):
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self.breaker = CircuitBreaker()
+        self._lock = threading.Lock()
+        self._ssl_context = None
+        self._idle = {}
+        self._pid = os.getpid()
+
+    @property
+    def ssl_context(self):
+        if self._ssl_context is None:
+            with self._lock:
+                if self._ssl_context is None:
+                    self._ssl_context = ssl.create_default_context()
+        return self._ssl_context
+
+    def request(self, url, headers=None):
+        """Send a GET request, following redirects.
+
+        :param url: A http or https URL.
+        :param headers: A dict of more request headers.
+        :return: A Response, with the decoded body.
+        """
+        if get_settings().offline:
+            raise OfflineError('offline, not requesting {}'.format(url))
+        for _ in range(MAX_REDIRECTS + 1):
+            status, reason, response_headers, body = self._send(url, headers)
+            location = response_headers.get('Location')
+            if status in REDIRECT_STATUSES and location:
+                url = urljoin(url, location)
+                continue
+            if status >= 400:
+                raise urllib.error.HTTPError(
+                    url, status, reason, response_headers, None)
+            return Response(url, status, response_headers, body)
+        raise urllib.error.HTTPError(
+            url, status, 'Too many redirects', response_headers, None)
+
+    def get(self, url, headers=None):
+        """Return the body of a URL, see request()."""
+        return self.request(url, headers).body
+
+    def get_json(self, url, headers=None):
+        """Return the JSON document of a URL."""
+        return json.loads(self.get(url, headers))
+
+    def close(self):
+        """Close the idle connections."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for connection in connections:
+                connection.close()
+
+    def _send(self, url, headers=None):
+        host = urlparse(url).netloc
+        if get_settings().remaining() == 0:
+            raise UnavailableError(
+                'the network deadline passed, not requesting {}'.format(url))
+        if not self.breaker.allow(host):
+            raise UnavailableError(
+                '{} keeps failing, not requesting {}'.format(host, url))
+        try:
+            response = self._request(url, headers)
+        except urllib.error.URLError:
+            self.breaker.failure(host)
+            raise
+        if response[0] in RETRY_STATUSES:
+            self.breaker.failure(host)
+        else:
+            self.breaker.success(host)
+        return response
+
+    def _request(self, url, headers=None):
+        parsed = urlparse(url)
+        if parsed.scheme not in ['http', 'https']:
+            raise urllib.error.URLError(
+                'unknown url type: {}'.format(parsed.scheme))
+        key = (parsed.scheme, parsed.hostname, parsed.port)
+        target = parsed.path or '/'
+        if parsed.query:
+            target += '?' + parsed.query
+        request_headers = {
+            'User-Agent': USER_AGENT,
+            'Accept-Encoding': 'gzip',
+        }
+        request_headers.update(headers or {})
+        attempt = 0
+        while True:
+            connection, reused = self._acquire(key)
+            self._set_timeout(connection)
+            try:
+                connection.request('GET',
+                                   self._request_target(connection,
+                                                        url,
+                                                        target),
+                                   headers=dict(
+                                       request_headers,
+                                       **getattr(connection,
+                                                 'proxy_headers',
+                                                 {})))
+                response = connection.getresponse()
+                body = response.read()
+            except (OSError, http.client.HTTPException) as e:
+                connection.close()
+                if reused:
+                    # The server closed the idle connection, which is
+                    # not a failure of the request.
+                    continue
+                if attempt >= self.retries:
+                    raise urllib.error.URLError(e)
+                self._wait(attempt, url, e)
+                attempt += 1
+                continue
+            if response.will_close:
+                connection.close()
+            else:
+                self._release(key, connection)
+            if response.status in RETRY_STATUSES and \
+                    attempt < self.retries:
+                self._wait(attempt,
+                           url,
+                           response.status,
+                           response.getheader('Retry-After'))
+                attempt += 1
+                continue
+            if response.getheader('Content-Encoding') == 'gzip':
+                try:
+                    body = gzip.decompress(body)
+                except (OSError, EOFError) as e:
+                    raise urllib.error.URLError(e)
+            return response.status, response.reason, response.msg, body
+
+    def _set_timeout(self, connection):
+        settings = get_settings()
+        timeout = settings.timeout or self.timeout
+        remaining = settings.remaining()
+        if remaining is not None:
+            if remaining == 0:
+                connection.close()
+                raise urllib.error.URLError('the network deadline passed')
+            timeout = min(timeout, remaining)
+        connection.timeout = timeout
+        if connection.sock:
+            connection.sock.settimeout(timeout)
+
+    def _wait(self, attempt, url, error, retry_after=None):
+        delay = self.backoff * 2 ** attempt
+        try:
+            delay = min(float(retry_after), MAX_RETRY_AFTER)
+        except (TypeError, ValueError):
+            pass
+        remaining = get_settings().remaining()
+        if remaining is not None and delay >= remaining:
+            raise urllib.error.URLError(
+                'the network deadline passes before the retry of {}: '
+                '{}'.format(url, error))
+        logger.debug(f'Retrying URL in {delay}s: {url}: {error}.')
+        time.sleep(delay)
+
+    def _acquire(self, key):
+        with self._lock:
+            if self._pid != os.getpid():
+                # Connections are not shared with forked processes.
+                self._idle = {}
+                self._pid = os.getpid()
+            connections = self._idle.get(key)
+            if connections:
+                return connections.pop(), True
+        return self._connect(*key), False
+
+    def _release(self, key, connection):
+        with self._lock:
+            connections = self._idle.setdefault(key, [])
+            if len(connections) < MAX_IDLE_CONNECTIONS:
+                connections.append(connection)
+                return
+        connection.close()
+
+    def _connect(self, scheme, host, port):
+        proxy = urllib.request.getproxies().get(scheme)
+        if proxy and urllib.request.proxy_bypass(host):
+            proxy = None
+        if scheme == 'https':
+            if proxy:
+                proxy = urlparse(proxy)
+                connection = http.client.HTTPSConnection(
+                    proxy.hostname,
+                    proxy.port,
+                    timeout=self.timeout,
+                    context=self.ssl_context)
+                connection.set_tunnel(host,
+                                      port,
+                                      headers=get_proxy_headers(proxy))
+                return connection
+            return http.client.HTTPSConnection(
+                host, port, timeout=self.timeout, context=self.ssl_context)
+        if proxy:
+            proxy = urlparse(proxy)
+            connection = http.client.HTTPConnection(
+                proxy.hostname, proxy.port, timeout=self.timeout)
+            # Requests to a HTTP proxy are sent with the full URL, and
+            # authenticate to it themselves.
+            connection.proxied = True
+            connection.proxy_headers = get_proxy_headers(proxy)
+            return connection
+        return http.client.HTTPConnection(host, port, timeout=self.timeout)
+
+    @staticmethod
+    def _request_target(connection, url, target):
+        if getattr(connection, 'proxied', False):
+            return url
+        return target
+
+
+def get_proxy_headers(proxy):
+    """Return the headers that authenticate to a proxy.
+
+    :param proxy: The parsed proxy URL, with the user and password in it
+        if the proxy asks for them.
+    """
+    if proxy.username is None:
+        return {}
+    credentials = '{}:{}'.format(unquote(proxy.username),
+                                 unquote(proxy.password or ''))
+    return {'Proxy-Authorization': 'Basic {}'.format(
+        base64.b64encode(credentials.encode('utf-8')).decode('ascii'))}
+
+
+client = HttpClient()
+
+
+def get_client():
+    return client
@@ -240,9 +240,12 @@ class LintProblem(object):
         self._prev = value
 
 
-def get_syntax_error(buffer):
+def get_syntax_error(buffer, parsed=None):
     try:
-        list(yaml.parse(buffer, Loader=yaml.BaseLoader))
+        if parsed is None:
+            list(yaml.parse(buffer, Loader=yaml.BaseLoader))
+        else:
+            parsed.check_syntax()
     except yaml.error.MarkedYAMLError as e:
         problem = LintProblem(e.problem_mark.line + 1,
                               e.problem_mark.column + 1,
@@ -0,0 +1,130 @@
+# Copyright © 2023 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+import re
+from functools import lru_cache
+from bisect import bisect_left, bisect_right
+from packaging.version import parse as version_parse
+
+from yamllint.config import YamlLintConfigError
+
+OPERATORS = ['==', '!=', '>=', '<=', '>', '<']
+
+
+class VersionIndex(object):
+    """The versions of a plugin, each parsed once, oldest first.
+
+    :param versions: The version strings.
+    """
+
+    def __init__(self, versions):
+        parsed = sorted({(version_parse(v), v) for v in versions})
+        self.parsed = [p for p, _ in parsed]
+        self.versions = [v for _, v in parsed]
+
+    def find(self, version):
+        """Return the version string equal to a parsed version, or None."""
+        i = bisect_left(self.parsed, version)
+        if i < len(self.parsed) and self.parsed[i] == version:
+            return self.versions[i]
+
+    def select(self, validations):
+        """Return the versions that meet all validations, oldest first.
+
+        The bounds are found by binary search, so only the versions
+        excluded by != are compared one by one.
+
+        :param validations: A dict of operator to parsed versions, see
+            parse_validations(). == is not checked.
+        """
+        low, high = 0, len(self.parsed)
+        for version in validations['>=']:
+            low = max(low, bisect_left(self.parsed, version))
+        for version in validations['>']:
+            low = max(low, bisect_right(self.parsed, version))
+        for version in validations['<=']:
+            high = min(high, bisect_right(self.parsed, version))
+        for version in validations['<']:
+            high = min(high, bisect_left(self.parsed, version))
+        excluded = set(validations['!='])
+        return [v for p, v in zip(self.parsed[low:high],
+                                  self.versions[low:high])
+                if p not in excluded]
+
+
+def get_validations(version_constraints):
+    validations = {operator: [] for operator in OPERATORS}
+    # Organize the version constraints so we get a dict like this:
+    # {
+    #    '==': [],
+    #    '!=': ['1.0'],
+    #    '>=': ['0.8', 0.9'],
+    #    '<=': ['1.1'],
+    # }
+    try:
+        for version_constraint in version_constraints:
+            sign = re.match('[\\<\\>\\=\\!]+', version_constraint).group(0)
+            plugin_version = re.findall(
+                '(\\d+.\\d+.\\d+)', version_constraint)[0]
+            validations[sign].append(plugin_version)
+    except Exception as e:
+        raise YamlLintConfigError('invalid version: %s' % e)
+    return validations
+
+
+def get_version_constraints(plugin_name, plugin_version_string):
+    version_constraints = list(
+        # Get rid of irrelevant stringy stuff.
+        filter(
+            lambda item: item, re.split(
+                'plugin:| |{}|,'.format(plugin_name),
+                plugin_version_string)
+        )
+    )
+    # re.split is afraid of this one.
+    if '?version' in version_constraints:
+        version_constraints.remove('?version')
+    if 'version=' in version_constraints:
+        version_constraints.remove('version=')
+    return version_constraints
+
+
+@lru_cache(maxsize=1024)
+def parse_validations(plugin_name, plugin_version_string):
+    """Return the validations of a plugin import, with parsed versions.
+
+    :return: A dict of operator to a tuple of parsed versions.
+    :raises YamlLintConfigError: If a constraint is invalid.
+    """
+    validations = get_validations(
+        get_version_constraints(plugin_name, plugin_version_string))
+    return {operator: tuple(version_parse(v) for v in versions)
+            for operator, versions in validations.items()}
+
+
+@lru_cache(maxsize=256)
+def get_version_index(versions):
+    """Return the VersionIndex of a tuple of versions."""
+    return VersionIndex(versions)
+
+
+@lru_cache(maxsize=1024)
+def resolve_version(plugin_name, plugin_version_string, versions):
+    """Return the version of a plugin that an import asks for.
+
+    This is the version of a single == constraint, if the plugin has
+    it, or else the newest version that meets the other constraints.
+
+    :param plugin_name: The plugin name.
+    :param plugin_version_string: The query of the plugin import.
+    :param versions: A tuple of the versions of the plugin.
+    :return: A version string, or None if none meets the constraints.
+    """
+    validations = parse_validations(plugin_name, plugin_version_string)
+    index = get_version_index(versions)
+    if len(validations['==']) == 1:
+        version = index.find(validations['=='][0])
+        if version:
+            return version
+    matches = index.select(validations)
+    if matches:
+        return matches[-1]
@@ -0,0 +1,146 @@
+# Copyright © 2023 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+import os
+import json
+import hashlib
+from functools import lru_cache
+from urllib.parse import urlparse
+
+from ne_lint import __version__
+from ne_lint.logger import logger
+from ne_lint.yamllint_ext import cache, schemas
+from ne_lint.yamllint_ext.overrides import LintProblem
+from ne_lint.yamllint_ext.utils import (
+    REMOTE_IMPORT_SCHEMES,
+    get_import_digest,
+    get_runtime_cache_dir)
+
+RESULTS_DIR = '__results'
+MISSING = 'missing'
+# The LintProblem attributes that are stored, all plain values.
+PROBLEM_FIELDS = [
+    '_line',
+    'column',
+    '_desc',
+    'rule',
+    'level',
+    '_file',
+    '_start_mark',
+    '_end_mark',
+    '_fixable',
+    '_severity',
+    '_update_line',
+    '_fixed',
+]
+
+
+def file_digest(path):
+    try:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return MISSING
+
+
+@lru_cache(maxsize=None)
+def bundled_data_digest():
+    """Digest of the bundled properties.json and datatypes.json."""
+    return ':'.join(file_digest(path) for path in [
+        schemas.PROPERTIES_JSON, schemas.DATATYPES_JSON])
+
+
+class ResultCache(object):
+    """Persistent lint results, keyed by everything a result depends on.
+
+    The key combines the blueprint content and path, the resolved
+    configuration, the ne-lint version and the bundled schema. The
+    imports a blueprint resolves are only known after linting it, so
+    every entry also stores the digests of the files and cached remote
+    imports its imports were read from, and an entry is only replayed
+    while they are unchanged.
+    """
+
+    def __init__(self, root=None):
+        self.root = root or os.path.join(get_runtime_cache_dir(),
+                                         RESULTS_DIR)
+
+    def key(self, content, file_path, conf, skip_suggestions=None):
+        """Return the cache key of a lint.
+
+        :param content: The blueprint content.
+        :param file_path: The blueprint path.
+        :param conf: The YamlLintConfigExt.
+        :param skip_suggestions: The sections to not suggest values for.
+        :return: A hex digest.
+        """
+        if isinstance(content, str):
+            content = content.encode('utf-8', 'surrogateescape')
+        digest = hashlib.sha256(content)
+        for part in [os.path.abspath(file_path),
+                     conf.digest,
+                     __version__.version,
+                     bundled_data_digest(),
+                     json.dumps(sorted(skip_suggestions or ()))]:
+            digest.update(b'\0' + part.encode('utf-8', 'surrogateescape'))
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Return the stored problems, or None if there are none.
+
+        :param key: The cache key.
+        :return: A list of LintProblem.
+        """
+        try:
+            entry = cache.read_json(self._path(key))
+        except (OSError, ValueError):
+            return
+        for path, digest in entry['imports'].items():
+            if file_digest(path) != digest:
+                return
+        for import_item, digest in entry.get('remote_imports', {}).items():
+            if get_import_digest(import_item) != digest:
+                return
+        return [self._load_problem(item) for item in entry['problems']]
+
+    def put(self, key, problems, resolved_imports):
+        """Store the problems of a lint.
+
+        Nothing is stored when a remote import was not cached, since it
+        could not be told apart from a changed one.
+
+        :param key: The cache key.
+        :param problems: A list of LintProblem.
+        :param resolved_imports: The import sources of the lint session.
+        """
+        imports = {}
+        remote_imports = {}
+        for import_item, sources in resolved_imports.items():
+            if urlparse(import_item).scheme in REMOTE_IMPORT_SCHEMES:
+                remote_imports[import_item] = get_import_digest(import_item)
+                if remote_imports[import_item] is None:
+                    return
+            for path in sources:
+                imports[path] = file_digest(path)
+        entry = {
+            'imports': imports,
+            'remote_imports': remote_imports,
+            'problems': [self._dump_problem(p) for p in problems],
+        }
+        try:
+            cache.write_json(self._path(key), entry)
+        except (OSError, TypeError):
+            logger.debug('Not pushing to result cache: {}'.format(key))
+
+    def _path(self, key):
+        return os.path.join(self.root, key + '.json')
+
+    @staticmethod
+    def _dump_problem(problem):
+        return {field: getattr(problem, field) for field in PROBLEM_FIELDS}
+
+    @staticmethod
+    def _load_problem(item):
+        problem = LintProblem(None, None)
+        for field in PROBLEM_FIELDS:
+            setattr(problem, field, item[field])
+        return problem
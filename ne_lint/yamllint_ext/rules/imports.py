@@ -28,6 +28,9 @@ def check(token=None, **_):
         yield from validate_string(import_item, token.line)
         yield from validate_import_items(import_item, token)
         yield from unused_imports(import_item, token)
+        yield from uncached_import(import_item, token)
+        yield from unavailable_import(import_item, token)
+        yield from import_cycle(import_item, token)
         token.line = token.line + 1
 
 
@@ -114,6 +117,61 @@ def validate_imported_dsl_version(line, dsl_version, imported_dsl):
             )
 
 
+def get_reported_imports(item):
+    """Return an import of the blueprint, and the imports of imports that
+    were merged for it, whose problems are reported on its line."""
+    return [item] + [nested for nested, top in
+                     ctx.get('nested_imports', {}).items() if top == item]
+
+
+def describe_import(item, import_item):
+    if import_item == item:
+        return 'import item {}'.format(item)
+    return 'import item {} imports {}, which'.format(item, import_item)
+
+
+def uncached_import(item, token):
+    if not isinstance(item, yaml.nodes.ScalarNode):
+        return
+    for import_item in get_reported_imports(item.value):
+        if import_item in ctx.get('uncached_imports', []):
+            yield LintProblem(
+                token.line,
+                None,
+                '{} is not cached, and cannot be read offline.'.format(
+                    describe_import(item.value, import_item))
+            )
+
+
+def unavailable_import(item, token):
+    if not isinstance(item, yaml.nodes.ScalarNode):
+        return
+    for import_item in get_reported_imports(item.value):
+        if import_item not in ctx.get('unavailable_imports', {}):
+            continue
+        if ctx['unavailable_imports'][import_item]:
+            message = '{} could not be read, ' \
+                      'an old cached copy of it was used.'
+        else:
+            message = '{} could not be read, ' \
+                      'only the bundled schemas were used for it.'
+        yield LintProblem(token.line,
+                          None,
+                          message.format(describe_import(item.value,
+                                                         import_item)))
+
+
+def import_cycle(item, token):
+    if isinstance(item, yaml.nodes.ScalarNode) and \
+            item.value in ctx.get('import_cycles', {}):
+        yield LintProblem(
+            token.line,
+            None,
+            'import item {} leads to an import cycle: {}.'.format(
+                item.value, ' -> '.join(ctx['import_cycles'][item.value]))
+        )
+
+
 def unused_imports(item, token):
     if 'post_processing_problems' not in ctx:
         ctx['post_processing_problems'] = {}
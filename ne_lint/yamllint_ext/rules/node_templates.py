@@ -8,6 +8,7 @@ from ne_lint.yamllint_ext import LintProblem
 from ne_lint.yamllint_ext.generators import NENode
 from ne_lint.yamllint_ext.constants import UNUSED_IMPORT_CTX
 from ne_lint.yamllint_ext.utils import (
+    get_unused_imports_of_node_type,
     recurse_get_readable_object,
     process_relevant_tokens,
     find_values_by_key,
@@ -520,9 +521,8 @@ def check_external_resource(model, line):
 
 def remove_node_type_from_context(node_type):
     if UNUSED_IMPORT_CTX in ctx:
-        for import_item in list(ctx[UNUSED_IMPORT_CTX].keys()):
-            if node_type in ctx[UNUSED_IMPORT_CTX][import_item]:
-                del ctx[UNUSED_IMPORT_CTX][import_item]
+        for import_item in get_unused_imports_of_node_type(node_type, ctx):
+            del ctx[UNUSED_IMPORT_CTX][import_item]
 
 
 def remove_plugin_from_context(plugin_name):
@@ -0,0 +1,244 @@
+# Copyright © 2023 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+import os
+import sys
+import json
+import struct
+import hashlib
+import mmap
+import marshal
+import pathlib
+import tempfile
+import threading
+from types import MappingProxyType
+from collections import ChainMap
+from collections.abc import Mapping
+
+SCHEMA_DIR = os.path.join(
+    pathlib.Path(__file__).parent.resolve(), 'nativeedge')
+PROPERTIES_JSON = os.path.join(SCHEMA_DIR, 'properties.json')
+DATATYPES_JSON = os.path.join(SCHEMA_DIR, 'datatypes.json')
+SCHEMA_BUNDLE = os.path.join(SCHEMA_DIR, 'schemas.bundle')
+# A bundle starts with the magic, the bundle format and marshal versions,
+# the digest of the JSON schemas it was compiled from and the size of the
+# index. The index maps every node type and data type to the offset and
+# size of its entry, and is followed by the entries.
+BUNDLE_MAGIC = b'NESCHEMA'
+BUNDLE_FORMAT = 2
+BUNDLE_HEADER = struct.Struct('<8sHH32sQ')
+
+
+class SchemaRegistry(object):
+    """The bundled node type and data type schemas.
+
+    The schemas are loaded on first use and then shared, read only, by
+    every lint in the process. A lint adds its own types on a layer over
+    them, see layer().
+    """
+
+    def __init__(self,
+                 properties_path=None,
+                 datatypes_path=None,
+                 bundle_path=None):
+        self.properties_path = properties_path or PROPERTIES_JSON
+        self.datatypes_path = datatypes_path or DATATYPES_JSON
+        self.bundle_path = bundle_path or SCHEMA_BUNDLE
+        self._lock = threading.Lock()
+        self._node_types_props = None
+        self._data_types = None
+
+    @property
+    def node_types_props(self):
+        """A read only mapping of node type name to its schema."""
+        if self._node_types_props is None:
+            self._load()
+        return self._node_types_props
+
+    @property
+    def data_types(self):
+        """A read only mapping of data type name to its properties."""
+        if self._data_types is None:
+            self._load()
+        return self._data_types
+
+    def layer(self):
+        """Return mappings for one lint, over the shared schemas.
+
+        Writes go to the layer and leave the shared schemas untouched.
+        A schema entry is shared as well, so replace it with an updated
+        copy instead of changing it in place.
+
+        :return: A tuple of the node types props and data types mappings.
+        """
+        return (ChainMap({}, self.node_types_props),
+                ChainMap({}, self.data_types))
+
+    def _load(self):
+        with self._lock:
+            if self._data_types is not None:
+                return
+            schemas = load_bundle(self.bundle_path,
+                                  self.properties_path,
+                                  self.datatypes_path)
+            if schemas is None:
+                schemas = load_json(self.properties_path,
+                                    self.datatypes_path)
+                schemas = [MappingProxyType(s) for s in schemas]
+            self._node_types_props, self._data_types = schemas
+
+
+class IndexedSchemas(Mapping):
+    """The schema entries of a bundle, decoded on first access.
+
+    :param buffer: The memory mapped bundle.
+    :param offset: The offset of the entries in the bundle.
+    :param index: A dict of name to the offset and size of its entry.
+    """
+
+    def __init__(self, buffer, offset, index):
+        self._buffer = buffer
+        self._offset = offset
+        self._index = index
+        self._decoded = {}
+
+    def __getitem__(self, name):
+        try:
+            return self._decoded[name]
+        except KeyError:
+            pass
+        start, size = self._index[name]
+        start += self._offset
+        value = marshal.loads(self._buffer[start:start + size])
+        return self._decoded.setdefault(name, value)
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self):
+        return len(self._index)
+
+
+registry = SchemaRegistry()
+
+
+def get_registry():
+    return registry
+
+
+def load_json(properties_path, datatypes_path):
+    with open(properties_path, 'r') as inf:
+        node_types_props = json.load(inf)
+    with open(datatypes_path, 'r') as inf:
+        data_types = json.load(inf)
+    return node_types_props, data_types
+
+
+def source_digest(properties_path, datatypes_path):
+    """Return the digest of the JSON schemas, or None if one is missing."""
+    digest = hashlib.sha256()
+    for path in [properties_path, datatypes_path]:
+        try:
+            with open(path, 'rb') as inf:
+                digest.update(hashlib.sha256(inf.read()).digest())
+        except OSError:
+            return
+    return digest.digest()
+
+
+def load_bundle(bundle_path, properties_path, datatypes_path):
+    """Open the schemas of a compiled bundle.
+
+    The bundle is memory mapped and only its index is decoded, each entry
+    is decoded when it is first looked up.
+
+    :return: A tuple of the node types props and data types mappings, or
+        None if the bundle is missing, was compiled by another format or
+        marshal version, or from other JSON schemas.
+    """
+    try:
+        with open(bundle_path, 'rb') as inf:
+            buffer = mmap.mmap(inf.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return
+    indexes = read_bundle_index(buffer, properties_path, datatypes_path)
+    if indexes is None:
+        buffer.close()
+        return
+    offset, node_types_index, data_types_index = indexes
+    return (IndexedSchemas(buffer, offset, node_types_index),
+            IndexedSchemas(buffer, offset, data_types_index))
+
+
+def read_bundle_index(buffer, properties_path, datatypes_path):
+    try:
+        magic, bundle_format, marshal_version, digest, index_size = \
+            BUNDLE_HEADER.unpack_from(buffer)
+    except struct.error:
+        return
+    if (magic, bundle_format, marshal_version) != \
+            (BUNDLE_MAGIC, BUNDLE_FORMAT, marshal.version):
+        return
+    current_digest = source_digest(properties_path, datatypes_path)
+    if current_digest is not None and current_digest != digest:
+        return
+    offset = BUNDLE_HEADER.size + index_size
+    try:
+        node_types_index, data_types_index = marshal.loads(
+            buffer[BUNDLE_HEADER.size:offset])
+    except (EOFError, ValueError, TypeError):
+        return
+    return offset, node_types_index, data_types_index
+
+
+def compile_bundle(properties_path=None,
+                   datatypes_path=None,
+                   bundle_path=None):
+    """Compile the JSON schemas into a bundle.
+
+    Every node type and data type is a separate entry. The strings in the
+    entries are interned, so that the names they share are kept once in
+    memory.
+    """
+    properties_path = properties_path or PROPERTIES_JSON
+    datatypes_path = datatypes_path or DATATYPES_JSON
+    bundle_path = bundle_path or SCHEMA_BUNDLE
+    entries = []
+    size = 0
+    indexes = []
+    for schemas in load_json(properties_path, datatypes_path):
+        index = {}
+        for name, value in schemas.items():
+            entry = marshal.dumps(intern_strings(value))
+            index[sys.intern(name)] = (size, len(entry))
+            entries.append(entry)
+            size += len(entry)
+        indexes.append(index)
+    index = marshal.dumps(tuple(indexes))
+    header = BUNDLE_HEADER.pack(
+        BUNDLE_MAGIC,
+        BUNDLE_FORMAT,
+        marshal.version,
+        source_digest(properties_path, datatypes_path),
+        len(index))
+    with tempfile.NamedTemporaryFile(
+            'wb', dir=os.path.dirname(bundle_path), delete=False) as f:
+        f.write(header)
+        f.write(index)
+        for entry in entries:
+            f.write(entry)
+    os.chmod(f.name, 0o644)
+    os.replace(f.name, bundle_path)
+
+
+def intern_strings(value):
+    if isinstance(value, str):
+        return sys.intern(value)
+    elif isinstance(value, dict):
+        return {intern_strings(k): intern_strings(v)
+                for k, v in value.items()}
+    elif isinstance(value, list):
+        return [intern_strings(v) for v in value]
+    return value
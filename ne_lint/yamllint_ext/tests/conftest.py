@@ -0,0 +1,14 @@
+# Copyright © 2023 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+import pytest
+
+from ne_lint.yamllint_ext import cache
+
+
+@pytest.fixture(autouse=True)
+def cache_root(monkeypatch, tmp_path):
+    """Cache in the temporary directory of every test, not in ~/.cache."""
+    monkeypatch.setenv(cache.CACHE_DIR_ENV, str(tmp_path / 'ne-lint-cache'))
+    yield tmp_path / 'ne-lint-cache'
+    # What a test put off is not refreshed by the next one.
+    cache.take_refreshes()
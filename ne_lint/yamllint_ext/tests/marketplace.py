@@ -0,0 +1,325 @@
+# Copyright © 2023 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+"""A local stand-in of the marketplace, for tests and benchmarks.
+
+It serves the endpoints that utils reads, and the latest plugin YAMLs:
+
+    with Marketplace(latency=0.05) as marketplace:
+        os.environ.update(marketplace.environ())
+        ...
+
+Run it on its own with:
+
+    python -m ne_lint.yamllint_ext.tests.marketplace --port 8080
+"""
+
+import json
+import time
+import random
+import argparse
+import threading
+from urllib.parse import urlparse, parse_qs
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import yaml
+from packaging.version import parse as version_parse
+
+from ne_lint.yamllint_ext import utils
+from ne_lint.yamllint_ext.constants import LATEST_PLUGIN_YAMLS
+
+DEFAULT_VERSIONS = ['1.0.0', '1.1.0', '2.0.0', '2.1.3', '3.0.0']
+DEFAULT_NODE_TYPES = 120
+PAGE_SIZE = utils.NODE_TYPES_PAGE_SIZE
+
+
+def marketplace_name(plugin_name):
+    # The marketplace knows plugins by their old names.
+    return plugin_name.replace('nativeedge-', 'cloudify-')
+
+
+def make_node_types(plugin_name, version, count=DEFAULT_NODE_TYPES):
+    """Return a dict of made up node types of a plugin version."""
+    prefix = plugin_name.replace('nativeedge-', '').replace('-plugin', '')
+    return {
+        'cloudify.nodes.{}.Type{}'.format(prefix, i): {
+            'derived_from': 'cloudify.nodes.Root',
+            'properties': {
+                'version': {'type': 'string', 'default': version},
+                'resource_id': {'type': 'string', 'default': ''},
+            },
+        } for i in range(count)
+    }
+
+
+def make_plugins(plugin_names=None, versions=None,
+                 node_types=DEFAULT_NODE_TYPES):
+    """Return plugins to serve, by default those in LATEST_PLUGIN_YAMLS.
+
+    :return: A dict of plugin name to a dict of version to node types.
+    """
+    return {
+        plugin_name: {
+            version: make_node_types(plugin_name, version, node_types)
+            for version in versions or DEFAULT_VERSIONS
+        } for plugin_name in plugin_names or LATEST_PLUGIN_YAMLS
+    }
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        marketplace = self.server.marketplace
+        url = urlparse(self.path)
+        marketplace.requests.append(url.path)
+        status = marketplace.inject()
+        if status == 429:
+            self.send_json({'message': 'Too many requests.'}, status,
+                           {'Retry-After': str(marketplace.retry_after)})
+            return
+        elif status:
+            self.send_json({'message': 'Failed.'}, status)
+            return
+        parts = url.path.strip('/').split('/')
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if parts == ['plugins']:
+            self.send_json(marketplace.get_plugins(query.get('name')))
+        elif len(parts) == 3 and parts[0] == 'plugins' and \
+                parts[2] == 'versions':
+            self.send_found(marketplace.get_versions(parts[1]))
+        elif len(parts) == 3 and parts[0] == 'plugins':
+            self.send_found(marketplace.get_release(parts[1], parts[2]))
+        elif len(parts) == 4 and parts[0] == 'plugins' and \
+                parts[3] == 'plugin.yaml':
+            self.send_yaml(marketplace.get_plugin_yaml(parts[1], parts[2]))
+        elif parts == ['node-types']:
+            self.send_json(marketplace.get_node_types(
+                query.get('plugin_name'),
+                query.get('plugin_version'),
+                int(query.get('offset') or 0)))
+        elif parts[-4:] == ['releases', 'download', 'latest', 'plugin.yaml']:
+            self.send_yaml(marketplace.get_latest_plugin_yaml(parts[-5]))
+        else:
+            self.send_json({'message': 'Not found.'}, 404)
+
+    def send_found(self, value):
+        if value is None:
+            self.send_json({'message': 'Not found.'}, 404)
+        else:
+            self.send_json(value)
+
+    def send_yaml(self, value):
+        if value is None:
+            self.send_json({'message': 'Not found.'}, 404)
+        else:
+            self.send_body(yaml.safe_dump(value).encode('utf-8'),
+                           'application/x-yaml')
+
+    def send_json(self, value, status=200, headers=None):
+        self.send_body(json.dumps(value).encode('utf-8'),
+                       'application/json', status, headers)
+
+    def send_body(self, body, content_type, status=200, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class Marketplace(object):
+    """A marketplace served on a local port, in a thread.
+
+    :param plugins: A dict of plugin name to a dict of version to node
+        types, see make_plugins().
+    :param latency: Seconds to wait before every response.
+    :param failure_rate: The share of requests to answer with a 503.
+    :param throttle_rate: The share of requests to answer with a 429.
+    :param retry_after: The Retry-After of a 429, in seconds.
+    :param page_size: The number of node types in a page.
+    :param seed: The seed of the failures and throttles.
+    :param port: The port to listen on, by default any free port.
+    """
+
+    def __init__(self,
+                 plugins=None,
+                 latency=0,
+                 failure_rate=0,
+                 throttle_rate=0,
+                 retry_after=0,
+                 page_size=PAGE_SIZE,
+                 seed=None,
+                 port=0):
+        if plugins is None:
+            plugins = make_plugins()
+        self.plugins = {marketplace_name(name): (name, versions)
+                        for name, versions in plugins.items()}
+        self.ids = {str(i): name for i, name in enumerate(self.plugins)}
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.page_size = page_size
+        self.random = random.Random(seed)
+        self.random_lock = threading.Lock()
+        self.requests = []
+        self.server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+        self.server.daemon_threads = True
+        self.server.marketplace = self
+        self.thread = None
+
+    @property
+    def url(self):
+        return 'http://127.0.0.1:{}'.format(self.server.server_port)
+
+    def environ(self):
+        """Return the environment that points ne-lint at this marketplace.
+        """
+        return {
+            utils.MARKETPLACE_URL_ENV: self.url,
+            utils.PLUGIN_YAMLS_URL_ENV: self.url,
+        }
+
+    def start(self):
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    def inject(self):
+        """Wait for the latency, and return a status to fail with, or None.
+        """
+        if self.latency:
+            time.sleep(self.latency)
+        with self.random_lock:
+            draw = self.random.random()
+        if draw < self.throttle_rate:
+            return 429
+        if draw < self.throttle_rate + self.failure_rate:
+            return 503
+
+    def get_id(self, name):
+        for plugin_id, plugin_name in self.ids.items():
+            if plugin_name == name:
+                return plugin_id
+
+    def get_node_types_of(self, name, version):
+        if name not in self.plugins:
+            return
+        versions = self.plugins[name][1]
+        if version not in versions:
+            # A plugin import without a spec asks for version None.
+            version = max(versions, key=version_parse)
+        return versions[version]
+
+    def get_plugins(self, name):
+        if name not in self.plugins:
+            return {'items': [], 'metadata': {'pagination': {'total': 0}}}
+        return {
+            'items': [{'id': self.get_id(name), 'name': name}],
+            'metadata': {'pagination': {'total': 1}},
+        }
+
+    def get_versions(self, plugin_id):
+        if plugin_id not in self.ids:
+            return
+        versions = self.plugins[self.ids[plugin_id]][1]
+        return {'items': [{'version': version} for version in versions]}
+
+    def get_release(self, plugin_id, version):
+        if plugin_id not in self.ids or \
+                version not in self.plugins[self.ids[plugin_id]][1]:
+            return
+        return {
+            'id': plugin_id,
+            'name': self.ids[plugin_id],
+            'version': version,
+            'yaml_urls': [{
+                'dsl_version': 'nativeedge_dsl_1_0',
+                'url': '{}/plugins/{}/{}/plugin.yaml'.format(
+                    self.url, plugin_id, version),
+            }],
+        }
+
+    def get_plugin_yaml(self, plugin_id, version):
+        if self.get_release(plugin_id, version) is None:
+            return
+        return self.make_plugin_yaml(self.ids[plugin_id], version)
+
+    def get_latest_plugin_yaml(self, plugin_name):
+        return self.make_plugin_yaml(marketplace_name(plugin_name), None)
+
+    def make_plugin_yaml(self, name, version):
+        node_types = self.get_node_types_of(name, version)
+        if node_types is None:
+            return
+        return {
+            'plugins': {
+                self.plugins[name][0]: {'executor': 'central_deployment_agent'}
+            },
+            'node_types': {
+                node_type.replace('cloudify.nodes', 'nativeedge.nodes'): {
+                    k: v.replace('cloudify.nodes', 'nativeedge.nodes')
+                    if isinstance(v, str) else v
+                    for k, v in definition.items()
+                } for node_type, definition in node_types.items()
+            },
+        }
+
+    def get_node_types(self, name, version, offset):
+        node_types = self.get_node_types_of(name, version) or {}
+        items = [dict(definition, type=node_type)
+                 for node_type, definition in node_types.items()]
+        return {
+            'items': items[offset:offset + self.page_size],
+            'pagination': {
+                'offset': offset,
+                'size': self.page_size,
+                'total': len(items),
+            },
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0)
+    parser.add_argument('--failure-rate', type=float, default=0)
+    parser.add_argument('--throttle-rate', type=float, default=0)
+    parser.add_argument('--retry-after', type=float, default=0)
+    parser.add_argument('--node-types', type=int, default=DEFAULT_NODE_TYPES)
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+    marketplace = Marketplace(
+        plugins=make_plugins(node_types=args.node_types),
+        latency=args.latency,
+        failure_rate=args.failure_rate,
+        throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after,
+        seed=args.seed,
+        port=args.port)
+    for name, value in marketplace.environ().items():
+        print('export {}={}'.format(name, value))
+    try:
+        marketplace.server.serve_forever()
+    except KeyboardInterrupt:
+        marketplace.server.server_close()
+
+
+if __name__ == '__main__':
+    main()
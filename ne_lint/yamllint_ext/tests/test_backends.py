@@ -0,0 +1,142 @@
+# Copyright © 2023 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+import io
+import os
+import yaml
+import pytest
+from tempfile import NamedTemporaryFile
+
+from ne_lint.yamllint_ext import run, rules, backends
+from ne_lint.yamllint_ext.generators import ParsedBlueprint
+from ne_lint.yamllint_ext.config import YamlLintConfigExt
+from ne_lint.yamllint_ext.autofix.indentation import (
+    utils as indentation_utils)
+
+pytestmark = pytest.mark.skipif(
+    not backends.libyaml_available(),
+    reason='PyYAML was built without libyaml.')
+
+BLUEPRINT = """tosca_definitions_version: nativeedge_1_0
+
+imports:
+  - nativeedge/types/types.yaml
+  - missing.yaml
+
+inputs:
+  region:
+    type: string
+    default: 'us-east-1'
+  flag:
+    type: boolean
+    default: yes
+  unused:
+    display_label: Unused
+
+dsl_definitions:
+  common: &common
+    region: { get_input: region }
+  client_config: &client_config
+    <<: *common
+    aws_access_key_id: { get_secret: key }
+
+node_templates:
+
+  vm:
+    type: nativeedge.nodes.aws.ec2.Instances
+    properties:
+      client_config: *client_config
+      resource_config:
+        ImageId: ami # the image
+    relationships:
+      - type: cloudify.relationships.contained_in
+        target: net
+
+  net:
+    type: cloudify.nodes.aws.ec2.Vpc
+    properties:
+      aws_config: *client_config
+      resource_config: { CidrBlock: 10.0.0.0/16 , Name : net }
+      enabled: [ true,false ]
+
+capabilities:
+  ip:
+    value: { get_attribute: [ vm, ip ] }
+"""
+
+SYNTAX_ERRORS = [
+    'inputs:\n  foo: [bar\n',
+    'inputs:\n  foo: bar: baz\n',
+    'inputs:\n  - foo\n - bar\n',
+    'inputs: {}\n---\nfoo: [\n',
+]
+
+
+def get_problems(content, backend):
+    backends.set_backend(backend)
+    conf = YamlLintConfigExt(content=None, yamllint_rules=rules)
+    blueprint = NamedTemporaryFile(mode='w', suffix='.yaml', delete=False)
+    blueprint.write(content)
+    blueprint.close()
+    try:
+        with io.open(blueprint.name, newline='') as f:
+            return [(p.line, p.column, p.rule, p.level, p.message)
+                    for p in run(f, conf)]
+    finally:
+        backends.set_backend(None)
+        os.remove(blueprint.name)
+
+
+def test_backends_report_the_same_problems():
+    resources = os.path.join(os.path.dirname(__file__), 'resources')
+    with open(os.path.join(resources, 'blueprint-labels.yaml')) as f:
+        contents = [f.read(), BLUEPRINT, BLUEPRINT.replace('\n', '\r\n')]
+    for content in contents:
+        python_problems = get_problems(content, backends.PYTHON)
+        assert python_problems
+        assert get_problems(content, backends.LIBYAML) == python_problems
+
+
+def test_backends_report_the_same_syntax_errors():
+    for content in SYNTAX_ERRORS:
+        errors = []
+        for backend in [backends.PYTHON, backends.LIBYAML]:
+            backends.set_backend(backend)
+            try:
+                ParsedBlueprint(content).check_syntax()
+            except Exception as e:
+                errors.append(str(e))
+            finally:
+                backends.set_backend(None)
+        assert len(errors) == 2
+        assert errors[0] == errors[1]
+
+
+def test_backends_produce_the_same_marks():
+    tokens = {}
+    for backend in [backends.PYTHON, backends.LIBYAML]:
+        backends.set_backend(backend)
+        try:
+            parsed = ParsedBlueprint(BLUEPRINT)
+            tokens[backend] = [
+                (type(t), t.start_mark.line, t.start_mark.column,
+                 t.start_mark.pointer, t.end_mark.pointer,
+                 t.end_mark.buffer, getattr(t, 'style', None))
+                for t in parsed.tokens]
+        finally:
+            backends.set_backend(None)
+    assert tokens[backends.PYTHON] == tokens[backends.LIBYAML]
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        backends.set_backend('foo')
+
+
+def test_autofix_loader_follows_backend():
+    for backend, loader in [(backends.PYTHON, yaml.SafeLoader),
+                            (backends.LIBYAML, backends.CSafeLoader)]:
+        backends.set_backend(backend)
+        try:
+            assert issubclass(indentation_utils.get_ext_loader(), loader)
+        finally:
+            backends.set_backend(None)
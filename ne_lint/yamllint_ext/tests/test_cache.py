@@ -0,0 +1,256 @@
+# Copyright © 2023 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+import os
+import json
+import time
+import yaml
+import pytest
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from mock import Mock, patch
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ne_lint.yamllint_ext import cache, utils
+from ne_lint.yamllint_ext.http_client import (
+    HttpClient, UnavailableError, get_client)
+
+ETAG = '"v1"'
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.requests.append(dict(self.headers))
+        if self.headers.get('If-None-Match') == ETAG:
+            self.send_response(304)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = json.dumps({'items': [{'id': 'plugin-id'}]}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('ETag', ETAG)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.mark.parametrize('store', [cache.FileStore, cache.SqliteStore])
+def test_marketplace_cache(server, tmp_path, store):
+    url = 'http://127.0.0.1:{}/plugins'.format(server.server_port)
+    client = HttpClient(backoff=0)
+    marketplace = cache.MarketplaceCache(
+        store(os.path.join(tmp_path, 'store')), client)
+    expected = {'items': [{'id': 'plugin-id'}]}
+    layer = cache.PLUGIN_IDS
+
+    assert marketplace.get_json(layer, 'aws', url) == expected
+    assert marketplace.get_json(layer, 'aws', url) == expected
+    assert len(server.requests) == 1
+
+    # Once the TTL passes, the entry is still used, and revalidated later
+    # with its ETag.
+    with patch('time.time', return_value=cache.time.time() + layer.ttl):
+        assert marketplace.get_json(layer, 'aws', url) == expected
+        assert len(server.requests) == 1
+        cache.run_refreshes()
+    assert len(server.requests) == 2
+    assert server.requests[1]['If-None-Match'] == ETAG
+
+    # Once it is max_stale old, it is revalidated before it is used.
+    later = cache.time.time() + layer.ttl + layer.max_stale
+    with patch('time.time', return_value=later):
+        with patch('ne_lint.yamllint_ext.cache.refresh_later') as refresh:
+            assert marketplace.get_json(layer, 'aws', url) == expected
+            assert not refresh.called
+    assert len(server.requests) == 3
+
+    # Every layer is cached apart.
+    assert marketplace.get_json(cache.PLUGIN_VERSIONS, 'aws', url) == \
+        expected
+    assert len(server.requests) == 4
+
+    client.close()
+
+    # A lookup that fails is unavailable, and is not cached.
+    client.retries = 0
+    closed = url.replace(str(server.server_port), '1')
+    with pytest.raises(UnavailableError):
+        marketplace.get_json(layer, 'gcp', closed)
+    assert marketplace.store.get(layer.name, 'gcp') is None
+
+
+def test_url_import_revalidation(server):
+    url = 'http://127.0.0.1:{}/types.yaml'.format(server.server_port)
+    expected = {'items': [{'id': 'plugin-id'}]}
+    store = utils.get_cache_store()
+    assert utils.fetch_import(url) == ('url', expected)
+    assert store.get(cache.IMPORTS.name, url).etag == ETAG
+
+    # A stale import is revalidated with its ETag later, and the 304
+    # response renews it.
+    later = time.time() + cache.IMPORTS.ttl + 1
+    with patch('time.time', return_value=later):
+        assert utils.fetch_import(url) == ('url', expected)
+        assert len(server.requests) == 1
+        cache.run_refreshes()
+    assert len(server.requests) == 2
+    assert server.requests[1]['If-None-Match'] == ETAG
+    assert store.get(cache.IMPORTS.name, url).fetched == later
+
+    # An import too old to use is revalidated before it is used.
+    later += cache.IMPORTS.max_stale + 1
+    with patch('time.time', return_value=later):
+        assert utils.fetch_import(url) == ('url', expected)
+    assert len(server.requests) == 3
+    assert server.requests[2]['If-None-Match'] == ETAG
+    assert store.get(cache.IMPORTS.name, url).fetched == later
+    get_client().close()
+
+
+def test_cache_root(monkeypatch, tmp_path):
+    monkeypatch.delenv(cache.CACHE_DIR_ENV, raising=False)
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path))
+    assert cache.get_cache_root() == os.path.join(tmp_path, 'ne-lint')
+    monkeypatch.setenv(cache.CACHE_DIR_ENV, str(tmp_path / 'cache'))
+    assert cache.get_cache_root() == str(tmp_path / 'cache')
+
+
+def test_evict(tmp_path):
+    paths = [str(tmp_path / 'layer' / name) for name in 'abc']
+    for i, path in enumerate(paths):
+        cache.write_json(path, 'x' * 98)
+        os.utime(path, (1000 + i, 1000 + i))
+        with cache.lock(path):
+            pass
+    # Reading a file makes it the most recently used.
+    cache.read_json(paths[0])
+    cache.evict(str(tmp_path), max_size=250)
+    assert [os.path.exists(path) for path in paths] == [True, False, True]
+    assert os.path.exists(paths[1] + cache.LOCK_SUFFIX)
+
+
+def test_sqlite_store(tmp_path):
+    store = cache.SqliteStore(os.path.join(tmp_path, cache.STORE_NAME))
+    value = {'node_types': {'nativeedge.nodes.Type': {'properties': {}}}}
+    entry = cache.CacheEntry(value, 1000.0, '"v1"', None)
+    store.put('imports', 'plugin:aws?version=1', entry, 86400)
+    # Imports that would share a sanitized file name are kept apart.
+    store.put('imports', 'plugin:aws?version_1',
+              entry._replace(value={}), 86400)
+    assert store.get('imports', 'plugin:aws?version=1') == entry
+    assert store.get('imports', 'plugin:aws?version_1').value == {}
+    assert store.get('plugin_ids', 'plugin:aws?version=1') is None
+    assert store.digest('imports', 'plugin:aws?version=1') != \
+        store.digest('imports', 'plugin:aws?version_1')
+
+    # Threads use connections of their own.
+    with ThreadPoolExecutor(2) as pool:
+        assert list(pool.map(
+            lambda _: store.get('imports', 'plugin:aws?version=1'),
+            range(2))) == [entry, entry]
+
+    assert cache.open_store(str(tmp_path)) is cache.open_store(tmp_path)
+    cache.evict(str(tmp_path), max_size=0)
+    assert store.get('imports', 'plugin:aws?version=1') is None
+
+
+def test_single_flight():
+    flight = cache.SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return {'value': len(calls)}
+
+    with ThreadPoolExecutor(4) as pool:
+        leader = pool.submit(flight.do, 'key', fetch)
+        started.wait(5)
+        followers = [pool.submit(flight.do, 'key', fetch) for _ in range(3)]
+        time.sleep(0.1)
+        release.set()
+        results = [leader.result()] + [f.result() for f in followers]
+    assert calls == [1]
+    assert results == [{'value': 1}] * 4
+    # The next call, once the first is done, runs again.
+    assert flight.do('key', fetch) == {'value': 2}
+
+    with pytest.raises(ValueError):
+        flight.do('key', Mock(side_effect=ValueError))
+
+
+def test_run_refreshes():
+    calls = []
+    release = threading.Event()
+    cache.refresh_later('slow', release.wait)
+    cache.refresh_later('key', lambda: calls.append('key'))
+    # A key is refreshed once, however often it is put off.
+    cache.refresh_later('key', lambda: calls.append('again'))
+    # What a refresh puts off is refreshed too.
+    cache.refresh_later(
+        'nested',
+        lambda: cache.refresh_later('inner', lambda: calls.append('inner')))
+    started = time.monotonic()
+    cache.run_refreshes(0.5)
+    assert time.monotonic() - started < 2
+    assert sorted(calls) == ['inner', 'key']
+    assert not cache.pending_refreshes
+    release.set()
+
+    refresh = Mock(side_effect=ValueError)
+    cache.refresh_later('failing', refresh)
+    assert cache.take_refreshes() == [('failing', refresh)]
+    cache.run_refreshes()
+    assert not refresh.called
+
+
+def test_document_cache(tmp_path):
+    path = str(tmp_path / 'types.yaml')
+    with open(path, 'w') as f:
+        f.write('node_types:\n  nativeedge.nodes.Type: {}\n')
+
+    def parse(path):
+        with open(path) as f:
+            return yaml.safe_load(f)
+
+    parse = Mock(side_effect=parse)
+    documents = cache.DocumentCache(str(tmp_path / 'documents'))
+    first = documents.load(path, parse)
+    second = documents.load(path, parse)
+    assert first == second == {'node_types': {'nativeedge.nodes.Type': {}}}
+    assert first is not second
+    # Other processes read the parsed file from the cache directory.
+    assert cache.DocumentCache(documents.root).load(path, parse) == first
+    assert parse.call_count == 1
+
+    with open(path, 'a') as f:
+        f.write('  nativeedge.nodes.Other: {}\n')
+    assert len(documents.load(path, parse)['node_types']) == 2
+    assert parse.call_count == 2
+
+    # Documents that marshal cannot keep are parsed every time.
+    with open(path, 'w') as f:
+        f.write('created: 2023-01-01\n')
+    documents.load(path, parse)
+    assert documents.load(path, parse) == \
+        {'created': datetime.date(2023, 1, 1)}
+    assert parse.call_count == 4
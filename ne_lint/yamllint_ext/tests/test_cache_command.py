@@ -0,0 +1,117 @@
+# Copyright © 2023 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+import os
+import pytest
+from mock import patch
+from click.testing import CliRunner
+
+from ne_lint.commands import cache, lint
+from ne_lint.yamllint_ext import http_client
+from ne_lint.yamllint_ext.constants import LATEST_PLUGIN_YAMLS
+
+PLUGIN = 'plugin:nativeedge-aws-plugin?version= >=3.0.0'
+BLUEPRINT = """tosca_definitions_version: nativeedge_1_0
+
+imports:
+  - nativeedge/types/types.yaml
+  - {}
+
+node_templates:
+  vm:
+    type: nativeedge.nodes.aws.ec2.Instances
+""".format(PLUGIN)
+NESTED_PLUGIN = 'plugin:nativeedge-gcp-plugin'
+NESTED_BLUEPRINT = """tosca_definitions_version: nativeedge_1_0
+
+imports:
+  - nativeedge/types/types.yaml
+  - types/gcp.yaml
+"""
+NODE_TYPES = {
+    'nativeedge.nodes.aws.ec2.Instances': {
+        'properties': {},
+    },
+}
+
+
+@pytest.fixture
+def cache_dir(tmp_path):
+    with patch('ne_lint.yamllint_ext.utils.get_runtime_cache_dir',
+               return_value=tmp_path):
+        yield tmp_path
+
+
+@pytest.fixture
+def blueprint(tmp_path):
+    path = os.path.join(tmp_path, 'blueprints')
+    os.makedirs(path)
+    with open(os.path.join(path, 'blueprint.yaml'), 'w') as f:
+        f.write(BLUEPRINT)
+    return os.path.join(path, 'blueprint.yaml')
+
+
+@pytest.fixture
+def nested_blueprint(tmp_path):
+    path = os.path.join(tmp_path, 'nested')
+    os.makedirs(os.path.join(path, 'types'))
+    with open(os.path.join(path, 'types', 'gcp.yaml'), 'w') as f:
+        f.write('imports:\n  - {}\n'.format(NESTED_PLUGIN))
+    with open(os.path.join(path, 'blueprint.yaml'), 'w') as f:
+        f.write(NESTED_BLUEPRINT)
+    return os.path.join(path, 'blueprint.yaml')
+
+
+def test_get_imports_to_warm(blueprint):
+    assert cache.get_imports_to_warm(
+        ['nativeedge-gcp-plugin', PLUGIN],
+        [os.path.dirname(blueprint)]) == \
+        ['plugin:nativeedge-gcp-plugin', PLUGIN]
+    assert len(cache.get_imports_to_warm(latest=True)) == \
+        len(LATEST_PLUGIN_YAMLS)
+
+
+def test_warm_and_lint_offline(cache_dir, blueprint):
+    def lint_offline():
+        [(_, problems, error)] = lint.lint_blueprints([blueprint],
+                                                      offline=True)
+        assert not http_client.get_settings().offline
+        assert error is None
+        return [(p.line, p.rule) for p in problems
+                if 'is not cached' in p.message]
+
+    with patch('ne_lint.yamllint_ext.utils.'
+               'get_node_types_for_plugin_import') as get_node_types:
+        assert lint_offline() == [(5, 'imports')]
+        assert not get_node_types.called
+
+        get_node_types.return_value = {}
+        result = CliRunner().invoke(
+            cache.cache, ['warm', '-d', os.path.dirname(blueprint)])
+        assert result.exit_code == 1
+
+        get_node_types.return_value = NODE_TYPES
+        result = CliRunner().invoke(
+            cache.cache, ['warm', '-d', os.path.dirname(blueprint)])
+        assert result.exit_code == 0
+        get_node_types.assert_called_with(PLUGIN)
+
+        get_node_types.reset_mock()
+        assert lint_offline() == []
+        assert not get_node_types.called
+
+
+def test_get_imports_to_warm_nested(cache_dir, nested_blueprint):
+    # The plugin is only imported by a local import of the blueprint.
+    assert cache.get_imports_to_warm(blueprint_dirs=[nested_blueprint]) == \
+        [NESTED_PLUGIN]
+
+
+def test_lint_offline_nested_import(cache_dir, nested_blueprint):
+    [(_, problems, error)] = lint.lint_blueprints([nested_blueprint],
+                                                  offline=True)
+    assert error is None
+    # The plugin that a local import imports is reported on its line.
+    [problem] = [p for p in problems if 'is not cached' in p.message]
+    assert (problem.line, problem.rule) == (5, 'imports')
+    assert 'types/gcp.yaml imports {}, which is not cached'.format(
+        NESTED_PLUGIN) in problem.message
@@ -1,5 +1,6 @@
 # Copyright © 2023 Dell Inc. or its subsidiaries. All Rights Reserved.
 
+import yaml
 import yamllint
 
 from .. import generators
@@ -34,3 +35,23 @@ def test_generate_nodes_recursively():
     result = get_gen_as_list(
         generators.generate_nodes_recursively, yaml_loader.get_node().value)
     assert result[7].value == result[-4:-2]
+
+
+def test_parsed_blueprint():
+    parsed = generators.ParsedBlueprint(YAML_CONTENT)
+    assert parsed.data == yaml.safe_load(YAML_CONTENT)
+    assert parsed.root.value[0][0].value == 'a'
+    parsed.check_syntax()
+    tokens = parsed.tokens
+    result = list(
+        generators.token_or_comment_or_line_generator(YAML_CONTENT, parsed))
+    assert parsed.tokens is tokens
+    assert [r for r in result if isinstance(r, generators.NENode)]
+
+    parsed = generators.ParsedBlueprint('a: [b\n')
+    try:
+        parsed.check_syntax()
+    except yaml.error.MarkedYAMLError as e:
+        assert e.problem_mark.line == 1
+    else:
+        assert False
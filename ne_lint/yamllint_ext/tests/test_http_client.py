@@ -0,0 +1,175 @@
+# Copyright © 2023 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+import gzip
+import json
+import time
+import pytest
+import threading
+import urllib.error
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from ne_lint.yamllint_ext.http_client import (
+    HttpClient,
+    NetworkSettings,
+    OfflineError,
+    UnavailableError,
+    get_settings)
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        self.server.requests.append((self.path, self.client_address))
+        self.server.headers.append(self.headers)
+        if self.path == '/flaky' and self.server.failures:
+            self.server.failures -= 1
+            return self.reply(503, b'')
+        elif self.path == '/slow':
+            time.sleep(0.5)
+        elif self.path == '/missing':
+            return self.reply(404, b'')
+        elif self.path == '/moved':
+            return self.reply(302, b'', {'Location': '/json'})
+        body = json.dumps({'path': self.path}).encode('utf-8')
+        if 'gzip' in self.headers.get('Accept-Encoding', ''):
+            return self.reply(200, gzip.compress(body),
+                              {'Content-Encoding': 'gzip'})
+        self.reply(200, body)
+
+    def reply(self, status, body, headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.requests = []
+    server.headers = []
+    server.failures = 2
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def url(server, path):
+    return 'http://127.0.0.1:{}{}'.format(server.server_port, path)
+
+
+def test_http_client(server):
+    client = HttpClient(backoff=0)
+    try:
+        assert client.get_json(url(server, '/json')) == {'path': '/json'}
+        assert client.get_json(url(server, '/moved')) == {'path': '/json'}
+        assert client.get_json(url(server, '/flaky')) == {'path': '/flaky'}
+        # Every request went over the same kept alive connection.
+        assert len(server.requests) == 6
+        assert len({address for _, address in server.requests}) == 1
+        with pytest.raises(urllib.error.HTTPError):
+            client.get(url(server, '/missing'))
+    finally:
+        client.close()
+    with pytest.raises(urllib.error.URLError):
+        HttpClient(retries=1, backoff=0).get(
+            url(server, '/').replace(str(server.server_port), '1'))
+
+
+def test_network_deadline(server):
+    client = HttpClient(retries=3, backoff=0.2)
+    started = time.monotonic()
+    with NetworkSettings(deadline=0.3).active():
+        with pytest.raises(urllib.error.URLError):
+            client.get(url(server, '/slow'))
+        # No request is sent once the deadline passes.
+        with pytest.raises(UnavailableError):
+            client.get(url(server, '/json'))
+    assert time.monotonic() - started < 1
+    assert get_settings().deadline is None
+    assert client.get_json(url(server, '/json')) == {'path': '/json'}
+    client.close()
+
+
+def test_network_settings_per_thread(server):
+    client = HttpClient(backoff=0)
+    expired = threading.Event()
+
+    def lint_offline():
+        with NetworkSettings(offline=True, deadline=0).active():
+            expired.set()
+            with pytest.raises(OfflineError):
+                client.get(url(server, '/json'))
+
+    with NetworkSettings(deadline=60).active():
+        thread = threading.Thread(target=lint_offline)
+        thread.start()
+        thread.join()
+        assert expired.is_set()
+        # The settings of the other thread are not used here.
+        assert client.get_json(url(server, '/json')) == {'path': '/json'}
+    assert client.get_json(url(server, '/json')) == {'path': '/json'}
+    client.close()
+
+
+def test_circuit_breaker(server):
+    client = HttpClient(retries=0, backoff=0)
+    client.breaker.threshold = 2
+    server.failures = 3
+    for _ in range(2):
+        with pytest.raises(urllib.error.HTTPError):
+            client.get(url(server, '/flaky'))
+    # The host failed twice in a row, so it is not requested.
+    with pytest.raises(UnavailableError):
+        client.get(url(server, '/json'))
+    assert len(server.requests) == 2
+
+    # After the cool-down, one request is let through, and it fails.
+    client.breaker.cooldown = 0
+    with pytest.raises(urllib.error.HTTPError):
+        client.get(url(server, '/flaky'))
+    client.breaker.cooldown = 60
+    with pytest.raises(UnavailableError):
+        client.get(url(server, '/flaky'))
+
+    client.breaker.cooldown = 0
+    assert client.get_json(url(server, '/flaky')) == {'path': '/flaky'}
+    client.breaker.cooldown = 60
+    assert client.get_json(url(server, '/json')) == {'path': '/json'}
+    client.close()
+
+
+def test_proxy_authorization(server, monkeypatch):
+    for name in ['no_proxy', 'NO_PROXY']:
+        monkeypatch.delenv(name, raising=False)
+    proxy = url(server, '').replace('://', '://user:p%40ss@')
+    monkeypatch.setenv('http_proxy', proxy)
+    monkeypatch.setenv('https_proxy', proxy)
+    authorization = 'Basic dXNlcjpwQHNz'
+
+    client = HttpClient(retries=0)
+    # The proxy is sent the full URL, with the credentials of the proxy.
+    assert client.get_json('http://marketplace.invalid/json') == \
+        {'path': 'http://marketplace.invalid/json'}
+    assert server.headers[0]['Proxy-Authorization'] == authorization
+    client.close()
+
+    # HTTPS is tunnelled through the proxy, which is sent the credentials
+    # on CONNECT.
+    connection = client._connect('https', 'marketplace.invalid', 443)
+    assert connection._tunnel_headers == \
+        {'Proxy-Authorization': authorization}
+
+    monkeypatch.setenv('http_proxy', url(server, ''))
+    server.headers.clear()
+    client.get_json('http://marketplace.invalid/json')
+    assert 'Proxy-Authorization' not in server.headers[0]
+    client.close()
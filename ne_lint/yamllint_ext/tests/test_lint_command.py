@@ -0,0 +1,64 @@
+# Copyright © 2023 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+import os
+import shutil
+import pytest
+from mock import patch
+
+from ne_lint.commands import lint
+
+RESOURCES = os.path.join(os.path.dirname(__file__), 'resources')
+
+
+@pytest.fixture
+def blueprints_dir(tmp_path):
+    path = str(tmp_path / 'blueprints')
+    os.makedirs(os.path.join(path, 'b', 'nested'))
+    os.makedirs(os.path.join(path, 'a'))
+    for name in ['b/nested/labels.yaml', 'a/labels.yaml', 'labels.yaml']:
+        shutil.copy(os.path.join(RESOURCES, 'blueprint-labels.yaml'),
+                    os.path.join(path, name))
+    with open(os.path.join(path, 'a', 'readme.txt'), 'w') as f:
+        f.write('not a blueprint')
+    return path
+
+
+def test_find_blueprints(blueprints_dir):
+    expected = [os.path.join(blueprints_dir, name) for name in
+                ['labels.yaml', 'a/labels.yaml', 'b/nested/labels.yaml']]
+    assert lint.find_blueprints([blueprints_dir]) == expected
+    assert lint.find_blueprints(
+        [os.path.join(blueprints_dir, '*', '**', '*.yaml'),
+         os.path.join(blueprints_dir, 'a', 'labels.yaml')]) == \
+        [expected[1], expected[2]]
+    with pytest.raises(RuntimeError):
+        lint.find_blueprints([os.path.join(blueprints_dir, 'foo.yaml')])
+    with pytest.raises(RuntimeError):
+        lint.find_blueprints([os.path.join(blueprints_dir, '*.yml')])
+
+
+def test_lint_blueprints_in_pool(blueprints_dir):
+    file_paths = lint.find_blueprints([blueprints_dir])
+    file_paths.append(os.path.join(blueprints_dir, 'missing.yaml'))
+
+    def summary(results):
+        return [(file_path,
+                 [(p.line, p.rule, p.message) for p in problems],
+                 str(error))
+                for file_path, problems, error in results]
+
+    sequential = summary(lint.lint_blueprints(file_paths))
+    parallel = summary(lint.lint_blueprints(file_paths, jobs=3))
+    assert parallel == sequential
+    assert [r[0] for r in parallel] == file_paths
+    assert parallel[0][1] and parallel[0][1] == parallel[2][1]
+    assert 'File path does not exist' in parallel[-1][2]
+
+
+def test_lint_blueprints_exit(blueprints_dir):
+    file_paths = lint.find_blueprints([blueprints_dir])
+    with patch('ne_lint.commands.lint.lint_blueprint',
+               side_effect=SystemExit(1)):
+        [(_, problems, error)] = lint.lint_blueprints(file_paths[:1])
+    assert problems == []
+    assert str(error) == 'Linting exited with 1.'
@@ -0,0 +1,151 @@
+# Copyright © 2023 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+import time
+import pytest
+from mock import patch
+from click.testing import CliRunner
+
+from ne_lint.commands import lint
+from ne_lint.yamllint_ext import utils, backends, cache, http_client
+from ne_lint.yamllint_ext.tests.marketplace import Marketplace, make_plugins
+
+PLUGINS = make_plugins(['nativeedge-aws-plugin'], ['1.0.0', '1.10.0', '2.0.0'],
+                       node_types=250)
+
+
+@pytest.fixture
+def marketplace(monkeypatch, tmp_path):
+    with Marketplace(PLUGINS, seed=0) as marketplace:
+        for name, value in marketplace.environ().items():
+            monkeypatch.setenv(name, value)
+        with patch('ne_lint.yamllint_ext.utils.get_runtime_cache_dir',
+                   return_value=tmp_path):
+            yield marketplace
+    http_client.get_client().close()
+    http_client.get_client().breaker.reset()
+
+
+def test_get_node_types_for_plugin_import(marketplace):
+    node_types = utils.get_node_types_for_plugin_import(
+        'plugin:nativeedge-aws-plugin?version= <2.0.0')
+    assert len(node_types) == 250
+    assert node_types['nativeedge.nodes.aws.Type249']['properties'][
+        'version']['default'] == '1.10.0'
+    assert marketplace.requests.count('/node-types') == 3
+
+    # Plugins and versions that the marketplace lacks.
+    assert utils.get_node_types_for_plugin_import(
+        'plugin:nativeedge-gcp-plugin') == {}
+    assert utils.get_plugin_spec('version= >2.0.0',
+                                 'nativeedge-aws-plugin') is None
+
+
+def test_plugin_yaml_urls(marketplace):
+    client = http_client.get_client()
+    url = utils.get_plugin_yaml_url('plugin:nativeedge-aws-plugin')
+    assert url.startswith(marketplace.url + '/plugins/')
+    assert 'nativeedge.nodes.aws.Type0' in \
+        backends.safe_load(client.get(url))['node_types']
+
+    url = utils.get_latest_plugin_yaml_url('nativeedge-aws-plugin')
+    assert url == marketplace.url + \
+        '/fusion-e/nativeedge-aws-plugin/releases/download/latest/plugin.yaml'
+    assert len(backends.safe_load(client.get(url))['node_types']) == 250
+
+
+def test_failure_injection(marketplace):
+    client = http_client.HttpClient(retries=0, backoff=0)
+    url = marketplace.url + '/plugins?name=cloudify-aws-plugin'
+    marketplace.throttle_rate = 1
+    marketplace.retry_after = 1
+    with pytest.raises(http_client.urllib.error.HTTPError) as e:
+        client.get_json(url)
+    assert e.value.code == 429
+    assert e.value.headers['Retry-After'] == '1'
+
+    marketplace.throttle_rate = 0
+    marketplace.failure_rate = 1
+    with pytest.raises(http_client.urllib.error.HTTPError) as e:
+        client.get_json(url)
+    assert e.value.code == 503
+
+    # Some failures are retried through.
+    marketplace.failure_rate = 0.5
+    client.retries = 10
+    assert client.get_json(url)['items'][0]['name'] == 'cloudify-aws-plugin'
+    client.close()
+
+
+def test_unavailable_marketplace(marketplace):
+    plugin = 'plugin:nativeedge-aws-plugin?version= <2.0.0'
+    source, result = utils.fetch_import(plugin)
+    assert source == 'plugin'
+
+    # The marketplace fails once the cached imports are too old to use.
+    marketplace.failure_rate = 1
+    later = time.time() + 100 * 86400
+    with patch.object(http_client.get_client(), 'backoff', 0), \
+            patch('time.time', return_value=later):
+        assert utils.fetch_import(plugin) == ('stale', result)
+        assert utils.fetch_import('plugin:nativeedge-gcp-plugin') == \
+            ('unavailable', {})
+        assert utils.fetch_import(marketplace.url + '/types.yaml') == \
+            ('unavailable', {})
+        # The marketplace failed too often, so it is not requested.
+        requests = len(marketplace.requests)
+        assert utils.fetch_import(plugin) == ('stale', result)
+        assert len(marketplace.requests) == requests
+
+        session = utils.LintSession()
+        with session.active():
+            utils.merge_import(plugin, ('stale', result))
+            assert session['unavailable_imports'] == {plugin: True}
+            assert 'nativeedge.nodes.aws.Type0' in \
+                session['imported_node_types']
+
+
+def test_marketplace_server_errors(marketplace, tmp_path):
+    plugin = 'plugin:nativeedge-aws-plugin'
+    blueprint = tmp_path / 'blueprint.yaml'
+    blueprint.write_text(
+        'tosca_definitions_version: nativeedge_1_0\n\n'
+        'imports:\n  - {}\n\n'
+        'node_templates:\n  vm:\n'
+        '    type: nativeedge.nodes.aws.Type0\n'.format(plugin))
+
+    # A plugin that was never cached is unavailable while the marketplace
+    # answers with 5xx, it does not lack node types.
+    marketplace.failure_rate = 1
+    with patch.object(http_client.get_client(), 'backoff', 0):
+        assert utils.fetch_import(plugin) == ('unavailable', {})
+        assert marketplace.requests
+        [(_, problems, error)] = lint.lint_blueprints([str(blueprint)])
+    assert error is None
+    [problem] = [p for p in problems if p.rule == 'imports']
+    assert '{} could not be read'.format(plugin) in problem.message
+
+
+def test_lint_refreshes_stale_imports(marketplace, tmp_path):
+    plugin = 'plugin:nativeedge-aws-plugin'
+    blueprints = tmp_path / 'blueprints'
+    blueprints.mkdir()
+    for name in ['a.yaml', 'b.yaml']:
+        (blueprints / name).write_text(
+            'tosca_definitions_version: nativeedge_1_0\n\n'
+            'imports:\n  - {}\n'.format(plugin))
+    assert utils.fetch_import(plugin)[0] == 'plugin'
+    store = utils.get_cache_store()
+    key = utils.canonical_import(plugin)
+    entry = store.get(cache.IMPORTS.name, key)
+    store.put(cache.IMPORTS.name,
+              key,
+              entry._replace(fetched=entry.fetched - 2 * 86400))
+    requests = len(marketplace.requests)
+
+    # The workers use the stale import, and the command refreshes it once
+    # they are done.
+    result = CliRunner().invoke(lint.lint, [str(blueprints), '--jobs', '2'])
+    assert result.exit_code == 0, result.output
+    assert len(marketplace.requests) > requests
+    assert cache.is_fresh(store.get(cache.IMPORTS.name, key),
+                          cache.IMPORTS.ttl)
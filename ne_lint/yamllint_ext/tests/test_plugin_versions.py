@@ -0,0 +1,54 @@
+# Copyright © 2023 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+import pytest
+from mock import patch
+
+from yamllint.config import YamlLintConfigError
+
+from ne_lint.yamllint_ext import utils, plugin_versions
+
+VERSIONS = ('1.0.0', '1.10.0', '1.2.0', '2.0.0', '1.9.1', '3.0.0')
+
+
+@pytest.mark.parametrize('query,expected', [
+    ('version= <2.0.0', '1.10.0'),
+    ('version= <=2.0.0', '2.0.0'),
+    ('version= >1.9.1,<1.10.0', None),
+    ('version= >=1.9.1,<=1.10.0', '1.10.0'),
+    ('version= >1.0.0,<3.0.0,!=2.0.0', '1.10.0'),
+    ('version= !=3.0.0', '2.0.0'),
+    ('version= ==1.2.0', '1.2.0'),
+    # An == version that the plugin does not have is not a constraint.
+    ('version= ==1.3.0', '3.0.0'),
+    ('version= ==1.3.0,<2.0.0', '1.10.0'),
+])
+def test_resolve_version(query, expected):
+    assert plugin_versions.resolve_version('aws', query, VERSIONS) == \
+        expected
+
+
+def test_resolve_version_is_memoized():
+    plugin_versions.resolve_version.cache_clear()
+    with patch('ne_lint.yamllint_ext.plugin_versions.VersionIndex',
+               wraps=plugin_versions.VersionIndex) as index:
+        plugin_versions.get_version_index.cache_clear()
+        for _ in range(3):
+            plugin_versions.resolve_version('aws', 'version= <2.0.0',
+                                            VERSIONS)
+        plugin_versions.resolve_version('aws', 'version= >=2.0.0', VERSIONS)
+    assert index.call_count == 1
+    assert plugin_versions.resolve_version.cache_info().hits == 2
+
+
+def test_get_plugin_spec():
+    with pytest.raises(YamlLintConfigError):
+        utils.get_plugin_spec('version= <2.0', 'aws')
+    with patch.multiple(
+            'ne_lint.yamllint_ext.utils',
+            get_plugin_id_from_marketplace=lambda _: 'id',
+            get_plugin_versions_from_marketplace=lambda _: list(VERSIONS),
+            get_plugin_release_spec_from_marketplace=lambda i, v: (i, v)):
+        assert utils.get_plugin_spec(
+            'version= <2.0.0', 'aws') == ('id', '1.10.0')
+        assert utils.get_plugin_spec(
+            'version= >3.0.0', 'aws') is None
@@ -0,0 +1,84 @@
+# Copyright © 2023 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+import os
+import pytest
+from mock import patch
+
+from ne_lint.commands import lint
+from ne_lint.yamllint_ext import rules
+from ne_lint.yamllint_ext.config import YamlLintConfigExt
+from ne_lint.yamllint_ext.result_cache import ResultCache
+
+BLUEPRINT = """tosca_definitions_version: nativeedge_1_0
+
+imports:
+  - nativeedge/types/types.yaml
+  - types.yaml
+
+inputs:
+  region:
+    type: string
+    default: yes
+"""
+
+
+@pytest.fixture
+def blueprint_dir(tmp_path):
+    path = str(tmp_path)
+    with open(os.path.join(path, 'blueprint.yaml'), 'w') as f:
+        f.write(BLUEPRINT)
+    with open(os.path.join(path, 'types.yaml'), 'w') as f:
+        f.write('node_types: {}\n')
+    return path
+
+
+def summary(problems):
+    return [(p.line, p.column, p.rule, p.level, p.message, p.file)
+            for p in problems]
+
+
+def test_result_cache(blueprint_dir):
+    blueprint = os.path.join(blueprint_dir, 'blueprint.yaml')
+    conf = YamlLintConfigExt(content=None, yamllint_rules=rules)
+    cache = ResultCache(os.path.join(blueprint_dir, 'cache'))
+
+    problems = lint.lint_blueprint(blueprint, conf, result_cache=cache)
+    assert problems
+    assert summary(lint.lint_blueprint(blueprint, conf)) == \
+        summary(problems)
+
+    with patch('ne_lint.commands.lint.run') as run:
+        replayed = lint.lint_blueprint(blueprint, conf, result_cache=cache)
+        assert not run.called
+    assert summary(replayed) == summary(problems)
+
+    # A changed import, or other lint options, lint the blueprint again.
+    with patch('ne_lint.commands.lint.run') as run:
+        lint.lint_blueprint(blueprint,
+                            conf,
+                            skip_suggestions=('inputs',),
+                            result_cache=cache)
+        assert run.called
+    with open(os.path.join(blueprint_dir, 'types.yaml'), 'a') as f:
+        f.write('data_types: {}\n')
+    with patch('ne_lint.commands.lint.run') as run:
+        lint.lint_blueprint(blueprint, conf, result_cache=cache)
+        assert run.called
+
+
+def test_result_cache_skips_unread_imports(blueprint_dir):
+    blueprint = os.path.join(blueprint_dir, 'blueprint.yaml')
+    conf = YamlLintConfigExt(content=None, yamllint_rules=rules)
+    cache = ResultCache(os.path.join(blueprint_dir, 'cache'))
+
+    def run_without_marketplace(*args, session=None, **kwargs):
+        session['unavailable_imports']['plugin:nativeedge-aws-plugin'] = True
+        return []
+
+    with patch('ne_lint.commands.lint.run',
+               side_effect=run_without_marketplace):
+        lint.lint_blueprint(blueprint, conf, result_cache=cache)
+    # The problems of the stale imports are not replayed.
+    with patch('ne_lint.commands.lint.run', return_value=[]) as run:
+        lint.lint_blueprint(blueprint, conf, result_cache=cache)
+        assert run.called
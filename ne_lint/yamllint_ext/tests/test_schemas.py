@@ -0,0 +1,106 @@
+# Copyright © 2023 Dell Inc. or its subsidiaries. All Rights Reserved.
+
+import json
+import pytest
+from collections import ChainMap
+from mock import patch
+
+from ne_lint.yamllint_ext import schemas, utils
+
+NODE_TYPE = 'nativeedge.nodes.aws.dynamodb.Table'
+
+
+def test_schema_registry_loads_once():
+    registry = schemas.SchemaRegistry()
+    with patch('ne_lint.yamllint_ext.schemas.load_bundle',
+               wraps=schemas.load_bundle) as load:
+        assert NODE_TYPE in registry.node_types_props
+        assert registry.data_types
+        registry.layer()
+        assert load.call_count == 1
+    with pytest.raises(TypeError):
+        registry.node_types_props['foo'] = {}
+
+
+def test_schema_layers():
+    registry = schemas.SchemaRegistry()
+    node_types_props, data_types = registry.layer()
+    node_types_props['foo'] = {'properties': {}}
+    data_types['bar'] = {}
+    assert 'foo' in node_types_props and 'bar' in data_types
+    assert NODE_TYPE in node_types_props
+    assert 'foo' not in registry.node_types_props
+    assert 'bar' not in registry.data_types
+    assert 'foo' not in registry.layer()[0]
+
+
+def test_import_does_not_change_shared_schemas(tmp_path):
+    registry = schemas.get_registry()
+    shared = registry.node_types_props[NODE_TYPE]
+    before = json.dumps(shared, sort_keys=True)
+    node_types = {NODE_TYPE: {'properties': {'foo': {'type': 'string'}}}}
+    with utils.LintSession().active():
+        utils.setup_types(data={'node_types': {}})
+        with patch('ne_lint.yamllint_ext.utils.get_runtime_cache_dir',
+                   return_value=tmp_path), \
+                patch('ne_lint.yamllint_ext.utils.'
+                      'get_node_types_for_plugin_import',
+                      return_value=node_types):
+            utils.import_dsl_yaml('plugin:foo-plugin')
+        assert 'foo' in utils.context['node_types_props'][NODE_TYPE]
+    assert json.dumps(shared, sort_keys=True) == before
+    assert registry.node_types_props[NODE_TYPE] is shared
+
+
+def test_shipped_bundle_is_current():
+    assert schemas.load_bundle(schemas.SCHEMA_BUNDLE,
+                               schemas.PROPERTIES_JSON,
+                               schemas.DATATYPES_JSON) == \
+        schemas.load_json(schemas.PROPERTIES_JSON, schemas.DATATYPES_JSON)
+
+
+def test_schema_bundle(tmp_path):
+    properties_path = str(tmp_path / 'properties.json')
+    datatypes_path = str(tmp_path / 'datatypes.json')
+    bundle_path = str(tmp_path / 'schemas.bundle')
+    with open(properties_path, 'w') as f:
+        json.dump({NODE_TYPE: {'properties': {'foo': {}}}}, f)
+    with open(datatypes_path, 'w') as f:
+        json.dump({'bar': {'foo': {}}}, f)
+    registry = schemas.SchemaRegistry(
+        properties_path, datatypes_path, bundle_path)
+    schemas.compile_bundle(properties_path, datatypes_path, bundle_path)
+    with patch('json.load') as load:
+        assert dict(registry.node_types_props) == \
+            {NODE_TYPE: {'properties': {'foo': {}}}}
+        assert not load.called
+
+    # A bundle of other schemas, or a broken one, is not used.
+    with open(datatypes_path, 'w') as f:
+        json.dump({'baz': {}}, f)
+    assert schemas.load_bundle(
+        bundle_path, properties_path, datatypes_path) is None
+    assert dict(schemas.SchemaRegistry(
+        properties_path, datatypes_path, bundle_path).data_types) == \
+        {'baz': {}}
+    with open(bundle_path, 'wb') as f:
+        f.write(b'foo')
+    assert schemas.load_bundle(
+        bundle_path, properties_path, datatypes_path) is None
+
+
+def test_schema_bundle_decodes_only_used_entries():
+    node_types_props, data_types = schemas.load_bundle(
+        schemas.SCHEMA_BUNDLE,
+        schemas.PROPERTIES_JSON,
+        schemas.DATATYPES_JSON)
+    node_types_layer = ChainMap({}, node_types_props)
+    data_types_layer = ChainMap({}, data_types)
+    assert NODE_TYPE in node_types_layer
+    assert 'foo' not in data_types_layer.keys()
+    assert len(node_types_layer) == len(node_types_props)
+    assert 'properties' in node_types_layer.get(NODE_TYPE, {})
+    assert node_types_layer.get('foo', {}) == {}
+    assert list(node_types_props._decoded) == [NODE_TYPE]
+    assert not data_types._decoded
+    assert node_types_props[NODE_TYPE] is node_types_props[NODE_TYPE]
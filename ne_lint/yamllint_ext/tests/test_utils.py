@@ -1,10 +1,16 @@
 # Copyright © 2023 Dell Inc. or its subsidiaries. All Rights Reserved.
 
+import os
+import time
 import yaml
+import pytest
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from mock import Mock, call, patch
 
 from . import get_gen
-from ne_lint.yamllint_ext import utils
+from ne_lint.yamllint_ext import rules, utils, LintProblem
+from ne_lint.yamllint_ext.config import YamlLintConfigExt
 
 
 def test_process_relevant_tokens():
@@ -115,3 +121,269 @@ def test_assign_current_top_level():
         'inputs', 'inputs', 100, 200)
     elem_mock.nextnext = yaml.tokens.BlockMappingStartToken(201, 300)
     assert utils.assign_current_top_level(elem_mock) == 'inputs'
+
+
+def test_lint_session():
+    session = utils.LintSession(dsl_version='nativeedge_1_0')
+    assert session['inputs'] == {}
+    assert utils.LintSession()['inputs'] is not session['inputs']
+    assert utils.get_session() is not session
+    with session.active():
+        assert utils.get_session() is session
+        assert utils.context['dsl_version'] == 'nativeedge_1_0'
+        utils.context['inputs']['foo'] = {}
+        with utils.LintSession().active():
+            assert 'foo' not in utils.context['inputs']
+        assert 'foo' in utils.context['inputs']
+    assert utils.get_session() is not session
+    assert session['inputs'] == {'foo': {}}
+
+
+def test_lint_session_per_thread():
+    sessions = [utils.LintSession(dsl_version=str(n)) for n in range(8)]
+    barrier = threading.Barrier(len(sessions))
+
+    def read_version(session):
+        with session.active():
+            barrier.wait()
+            return utils.context['dsl_version']
+
+    with ThreadPoolExecutor(len(sessions)) as executor:
+        versions = list(executor.map(read_version, sessions))
+    assert versions == [str(n) for n in range(8)]
+
+
+def test_rule_set():
+    conf = YamlLintConfigExt(content=None, yamllint_rules=rules)
+    assert rules.inputs.check.keywords == ('inputs', 'get_input')
+    assert rules.imports.check.keywords == ('imports',)
+    rule_set = conf.rule_set(None)
+    assert conf.rule_set(None) is rule_set
+    assert rule_set.node_rules['get_input'] == \
+        [(rules.inputs, conf.rules['inputs'])]
+    assert rules.capabilities in \
+        [rule for rule, _ in rule_set.node_rules['outputs']]
+    token_rules = [rule.ID for rule, _ in rule_set.token_rules]
+    assert 'truthy' in token_rules
+    assert 'inputs' not in token_rules
+    assert 'inputs' in rule_set.token_rule_ids
+    assert rule_set.comment_rules == []
+    assert 'line-length' in [rule.ID for rule, _ in rule_set.line_rules]
+    assert rules.get('truthy').LintProblem is LintProblem
+
+
+def test_setup_types_imports_in_order():
+    delays = {'a.yaml': 0.2, 'b.yaml': 0.1, 'c.yaml': 0}
+    threads = set()
+
+    def fetch_import(import_item, base_path=None, cache_ttl=None):
+        threads.add(threading.get_ident())
+        time.sleep(delays[import_item])
+        return 'path', {'tosca_definitions_version': import_item}
+
+    data = {'imports': ['a.yaml', 'b.yaml', 'c.yaml', 'a.yaml', {}]}
+    session = utils.LintSession()
+    with session.active():
+        with patch('ne_lint.yamllint_ext.utils.fetch_import',
+                   side_effect=fetch_import) as fetch:
+            utils.setup_types(data=data)
+        assert fetch.call_count == 3
+        assert len(threads) == 3
+        assert utils.context['imported_tosca_definitions_version'] == \
+            ['a.yaml', 'b.yaml', 'c.yaml', 'a.yaml']
+        assert list(utils.context['resolved_imports']) == \
+            ['a.yaml', 'b.yaml', 'c.yaml']
+
+
+def test_get_node_types_for_plugin_version():
+    def get_json_from_marketplace(url):
+        offset = int(url.rsplit('=', 1)[-1])
+        if offset == 200:
+            return {}
+        time.sleep(0.1 if offset == 100 else 0)
+        return {
+            'items': [{'type': 'cloudify.nodes.Type{}'.format(offset)},
+                      {'type': 'cloudify.nodes.Shared'}],
+            'pagination': {'total': 350},
+        }
+
+    with patch('ne_lint.yamllint_ext.utils.get_json_from_marketplace',
+               side_effect=get_json_from_marketplace) as get_json:
+        node_types = utils.get_node_types_for_plugin_version(
+            'nativeedge-aws-plugin', '1.0.0')
+    assert sorted(c.args[0].rsplit('=', 1)[-1]
+                  for c in get_json.call_args_list) == \
+        ['0', '100', '200', '300']
+    assert list(node_types) == ['nativeedge.nodes.Type0',
+                                'nativeedge.nodes.Shared',
+                                'nativeedge.nodes.Type100',
+                                'nativeedge.nodes.Type300']
+
+    with patch('ne_lint.yamllint_ext.utils.get_json_from_marketplace',
+               return_value={}):
+        assert utils.get_node_types_for_plugin_version(
+            'nativeedge-aws-plugin', '1.0.0') == {}
+
+
+def test_runtime_cache_dir_fallback(monkeypatch, tmp_path):
+    # The cache root cannot be created under a file.
+    (tmp_path / 'home').write_text('')
+    monkeypatch.setenv(utils.cache.CACHE_DIR_ENV, str(tmp_path / 'home' / 'c'))
+    monkeypatch.setattr(utils.tempfile, 'tempdir', str(tmp_path))
+    cache_dir = utils.get_runtime_cache_dir()
+    assert cache_dir.parent == tmp_path.resolve()
+    if hasattr(os, 'getuid'):
+        assert cache_dir.name == 'ne-lint-cache-{}'.format(os.getuid())
+        assert cache_dir.stat().st_mode & 0o777 == 0o700
+        # A directory that others may write to is not used.
+        cache_dir.chmod(0o777)
+        with pytest.raises(PermissionError):
+            utils.get_runtime_cache_dir()
+
+
+def test_read_or_fetch(tmp_path):
+    import_item = 'plugin:nativeedge-aws-plugin'
+
+    def fetched(value):
+        return utils.cache.CacheEntry(value, time.time(), None, None)
+
+    def fetch(entry):
+        time.sleep(0.1)
+        return fetched({'nativeedge.nodes.Type': {}})
+
+    fetch = Mock(side_effect=fetch)
+    with patch('ne_lint.yamllint_ext.utils.get_runtime_cache_dir',
+               return_value=tmp_path):
+        with ThreadPoolExecutor(4) as pool:
+            results = list(pool.map(
+                lambda _: utils.read_or_fetch(import_item, fetch), range(4)))
+        assert fetch.call_count == 1
+        fetch.assert_called_with(None)
+        assert results == [{'nativeedge.nodes.Type': {}}] * 4
+        assert utils.get_import_digest(import_item)
+
+        # A stale import is used, and fetched again later with the entry
+        # to revalidate.
+        newer = Mock(return_value=fetched({'nativeedge.nodes.Newer': {}}))
+        later = time.time() + utils.cache.IMPORTS.ttl + 1
+        with patch('time.time', return_value=later):
+            assert utils.read_or_fetch(import_item, newer) == results[0]
+            assert not newer.called
+            utils.cache.run_refreshes()
+            assert newer.call_count == 1
+            assert newer.call_args[0][0].value == results[0]
+            assert utils.read_or_fetch(import_item, newer) == \
+                newer.return_value.value
+
+        # What could not be fetched is not cached.
+        empty = Mock(return_value=fetched({}))
+        assert utils.read_or_fetch('plugin:missing', empty) == {}
+        assert utils.get_import_digest('plugin:missing') is None
+
+
+def test_canonical_import():
+    assert utils.canonical_import(
+        'plugin:nativeedge-aws-plugin?version= >=3.0.0, <4.0.0') == \
+        utils.canonical_import(
+            'plugin:nativeedge-aws-plugin?version= <4.0.0,>=3.0.0') == \
+        'plugin:nativeedge-aws-plugin?<4.0.0,>=3.0.0'
+    assert utils.canonical_import('plugin:nativeedge-aws-plugin') == \
+        'plugin:nativeedge-aws-plugin'
+    assert utils.canonical_import('types.yaml') == 'types.yaml'
+
+
+def test_import_graph(tmp_path):
+    files = {
+        'lib/common.yaml': {
+            'imports': ['types/base.yaml'],
+            'node_types': {'nativeedge.nodes.Common': {
+                'derived_from': 'nativeedge.nodes.Base'}},
+        },
+        'lib/other.yaml': {
+            'imports': ['types/base.yaml', 'common.yaml'],
+            'node_types': {'nativeedge.nodes.Other': {}},
+        },
+        'lib/types/base.yaml': {
+            'node_types': {'nativeedge.nodes.Base': {}},
+        },
+        'lib/a.yaml': {'imports': ['b.yaml']},
+        'lib/b.yaml': {'imports': ['a.yaml']},
+    }
+    for name, document in files.items():
+        path = tmp_path / 'blueprints' / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(yaml.safe_dump(document))
+    base_path = str(tmp_path / 'blueprints')
+    lib = str(tmp_path / 'blueprints' / 'lib')
+    imports = ['lib/common.yaml', 'lib/other.yaml', 'lib/common.yaml']
+
+    graph = utils.ImportGraph()
+    with patch('ne_lint.yamllint_ext.utils.get_runtime_cache_dir',
+               return_value=tmp_path / 'cache'), \
+            patch('ne_lint.yamllint_ext.utils.fetch_import',
+                  wraps=utils.fetch_import) as fetch:
+        order, cycles, nested = graph.resolve(imports, base_path)
+        # The imports of an import come first, and each import once,
+        # apart from the blueprint imports.
+        assert [(item, path) for item, path, _ in order] == [
+            ('types/base.yaml', lib),
+            ('lib/common.yaml', base_path),
+            ('lib/other.yaml', base_path),
+            ('lib/common.yaml', base_path)]
+        assert order[0][2] == ('relative', files['lib/types/base.yaml'])
+        assert cycles == {}
+        assert nested == {'types/base.yaml': 'lib/common.yaml'}
+        assert fetch.call_count == 4
+
+        # Unchanged imports are not read again, by any lint.
+        fetch.reset_mock()
+        assert graph.resolve(imports, base_path)[0] == order
+        assert not fetch.called
+        (tmp_path / 'blueprints' / 'lib' / 'other.yaml').write_text(
+            yaml.safe_dump(dict(files['lib/other.yaml'], imports=[])))
+        graph.resolve(imports, base_path)
+        assert fetch.call_args_list == [call('lib/other.yaml', base_path)]
+
+        assert graph.resolve(['lib/a.yaml'], base_path)[1] == \
+            {'lib/a.yaml': ['lib/a.yaml', 'b.yaml', 'a.yaml']}
+
+        session = utils.LintSession()
+        with session.active(), patch.object(utils, 'import_graph', graph):
+            utils.setup_types(data={'imports': imports}, base_path=base_path)
+            assert {'nativeedge.nodes.Base',
+                    'nativeedge.nodes.Common',
+                    'nativeedge.nodes.Other'} <= \
+                set(session['imported_node_types'])
+            assert session['resolved_imports']['types/base.yaml'][0] == \
+                os.path.join(lib, 'types/base.yaml')
+
+
+def test_unused_imports_index():
+    aws = 'plugin:nativeedge-aws-plugin'
+    gcp = 'plugin:nativeedge-gcp-plugin'
+    session = utils.LintSession()
+    with session.active():
+        utils.merge_import(aws, ('plugin', {'node_types': {
+            'nativeedge.nodes.aws.ec2.Instances': {},
+            'nativeedge.nodes.Shared': {}}}))
+        utils.merge_import(gcp, ('plugin', {'node_types': {
+            'nativeedge.nodes.gcp.Instance': {},
+            'nativeedge.nodes.Shared': {}}}))
+        assert session[utils.PLUGINS_BY_NODE_TYPE][
+            'nativeedge.nodes.Shared'] == {aws, gcp}
+        assert list(session['imported_node_types']) == [
+            'nativeedge.nodes.aws.ec2.Instances',
+            'nativeedge.nodes.Shared',
+            'nativeedge.nodes.gcp.Instance']
+        assert utils.check_node_imported('nativeedge.nodes.gcp.Instance')
+
+        utils.delete_imports_from_unused_ctx(
+            ['nativeedge.nodes.gcp.Instance', {'not': 'a type'}])
+        assert list(session[utils.UNUSED_IMPORT_CTX]) == [aws]
+        assert not utils.check_node_imported('nativeedge.nodes.gcp.Instance')
+        assert utils.check_node_imported('nativeedge.nodes.Shared')
+
+    # Contexts without the index are scanned.
+    legacy = {utils.UNUSED_IMPORT_CTX: {aws: ['nativeedge.nodes.Shared']}}
+    assert utils.get_unused_imports_of_node_type(
+        'nativeedge.nodes.Shared', legacy) == [aws]
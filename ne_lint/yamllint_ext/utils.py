@@ -3,19 +3,30 @@
 import io
 import os
 import re
-import ssl
-import sys
-import json
 import time
 import yaml
 import pathlib
-import urllib.request
-from urllib.parse import urlparse
-from packaging.version import parse as version_parse
-
-from yamllint.config import YamlLintConfigError
+import tempfile
+import functools
+import threading
+import contextvars
+import urllib.error
+from urllib.parse import urljoin, urlparse
+from contextlib import contextmanager
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from collections.abc import MutableMapping
 
 from ne_lint.logger import logger
+from ne_lint.yamllint_ext import (
+    cache,
+    schemas,
+    backends,
+    http_client,
+    plugin_versions)
+from ne_lint.yamllint_ext.plugin_versions import (  # noqa: F401
+    get_validations,
+    get_version_constraints)
 from ne_lint.yamllint_ext.nativeedge.models import NodeTemplate
 from ne_lint.yamllint_ext.constants import (
     UNUSED_IMPORT,
@@ -24,6 +35,7 @@ from ne_lint.yamllint_ext.constants import (
     BLUEPRINT_MODEL,
     UNUSED_IMPORT_CTX,
     LATEST_PLUGIN_YAMLS,
+    PLUGINS_BY_NODE_TYPE,
     NODE_TEMPLATE_MODEL)
 
 INTRINSIC_FNS = [
@@ -44,30 +56,116 @@ INTRINSIC_FNS = [
     'get_environment_capability',
 ]
 
-context = {
-    'node_types_props': {},
-    'imports': [],
-    'dsl_version': '',
-    'inputs': {},
-    'imported_node_types': [],
-    UNUSED_INPUTS: {},
-    UNUSED_IMPORT_CTX: {},
-    'node_templates': {},
-    'node_types': {},
-    'data_types': {},
-    'capabilities': {},
-    'outputs': {},
-    'current_tokens_line': 0,
-    'add_label': [],
-    'line_diff': {},
-    'labels': {},
-    'start_lines': {
-        'inputs': None,
-        'node_templates': None,
-    },
-}
+_current_session = contextvars.ContextVar('ne_lint_session')
+
+
+class LintSession(dict):
+    """The state of a single lint run.
+
+    Holds the inputs, node templates, imported types, unused imports and
+    line diffs that the rules collect while walking one blueprint. Every
+    run gets a fresh session, so runs in different threads do not see
+    each other's state.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__({
+            'node_types_props': {},
+            'imports': [],
+            'dsl_version': '',
+            'inputs': {},
+            # An ordered set of the imported node types.
+            'imported_node_types': {},
+            UNUSED_INPUTS: {},
+            UNUSED_IMPORT_CTX: {},
+            PLUGINS_BY_NODE_TYPE: {},
+            'node_templates': {},
+            'node_types': {},
+            'data_types': {},
+            'capabilities': {},
+            'outputs': {},
+            'current_tokens_line': 0,
+            'add_label': [],
+            'line_diff': {},
+            'labels': {},
+            'resolved_imports': {},
+            'uncached_imports': [],
+            'unavailable_imports': {},
+            'import_cycles': {},
+            'nested_imports': {},
+            'start_lines': {
+                'inputs': None,
+                'node_templates': None,
+            },
+        })
+        self.update(kwargs)
+
+    @contextmanager
+    def active(self):
+        """Make this the session that context refers to."""
+        token = _current_session.set(self)
+        try:
+            yield self
+        finally:
+            _current_session.reset(token)
+
+
+_default_session = LintSession()
+
+
+def get_session():
+    """Return the session of the current run.
+
+    Outside of a run this is a process wide default session.
+    """
+    return _current_session.get(_default_session)
+
+
+class SessionContext(MutableMapping):
+    """A mapping that reads and writes the session of the current run."""
+
+    def __getitem__(self, key):
+        return get_session()[key]
+
+    def __setitem__(self, key, value):
+        get_session()[key] = value
+
+    def __delitem__(self, key):
+        del get_session()[key]
+
+    def __contains__(self, key):
+        return key in get_session()
+
+    def __iter__(self):
+        return iter(get_session())
+
+    def __len__(self):
+        return len(get_session())
+
+    def get(self, key, default=None):
+        return get_session().get(key, default)
+
+
+context = SessionContext()
 
 MARKET_PLACE_DOMAIN = 'marketplace.cloudify.co'
+# These point the marketplace and the latest plugin YAMLs elsewhere, e.g.
+# at a local stand-in.
+MARKETPLACE_URL_ENV = 'NE_LINT_MARKETPLACE_URL'
+PLUGIN_YAMLS_URL_ENV = 'NE_LINT_PLUGIN_YAMLS_URL'
+PLUGIN_YAMLS_URL = 'https://github.com'
+LOCKS_DIR = '__locks'
+REMOTE_IMPORT_SCHEMES = ['plugin', 'http', 'https']
+# The most imports of a blueprint that are read at the same time.
+MAX_IMPORT_WORKERS = 8
+import_flight = cache.SingleFlight()
+# Remote imports are read again through the cache after this many
+# seconds, so that a long running process sees them refreshed.
+REMOTE_NODE_TTL = 60
+DEFAULT_IMPORTS = ['nativeedge/types/types.yaml', 'cloudify/types/types.yaml']
+# The marketplace returns the node types of a plugin in pages of this size.
+NODE_TYPES_PAGE_SIZE = 100
+MAX_PAGE_WORKERS = 8
 
 
 def assign_current_top_level(elem):
@@ -140,134 +238,92 @@ def skip_inputs_in_node_templates(top_level):
 
 
 def get_json_from_marketplace(url):
-    ctx = ssl.create_default_context()
-    # ctx.check_hostname = False
-    # ctx.verify_mode = ssl.CERT_NONE
+    """Return the JSON document of a marketplace URL, or {} if it is not
+    there.
+
+    :raises http_client.UnavailableError: If the marketplace is out of
+        reach or fails for now, see http_client.as_unavailable().
+    """
     try:
-        resp = urllib.request.urlopen(url, context=ctx)
+        return http_client.get_client().get_json(url)
     except (urllib.error.HTTPError, urllib.error.URLError) as e:
+        unavailable = http_client.as_unavailable(url, e)
+        if unavailable:
+            raise unavailable
         logger.error(f'Failed on URL: {url}: {str(e)}.')
         return {}
-    body = resp.read()
-    return json.loads(body)
+
+
+def get_marketplace_url():
+    """Return the base URL of the marketplace, see MARKETPLACE_URL_ENV."""
+    return os.environ.get(
+        MARKETPLACE_URL_ENV, f'https://{MARKET_PLACE_DOMAIN}').rstrip('/')
+
+
+def get_latest_plugin_yaml_url(plugin_name):
+    """Return the URL of the latest plugin YAML of a plugin, or None.
+
+    See PLUGIN_YAMLS_URL_ENV.
+    """
+    url = LATEST_PLUGIN_YAMLS.get(plugin_name)
+    base_url = os.environ.get(PLUGIN_YAMLS_URL_ENV)
+    if url and base_url and url.startswith(PLUGIN_YAMLS_URL):
+        url = base_url.rstrip('/') + url[len(PLUGIN_YAMLS_URL):]
+    return url
+
+
+def get_marketplace_cache():
+    return cache.MarketplaceCache(get_cache_store())
 
 
 def get_plugin_id_from_marketplace(plugin_name):
     plugin_name = plugin_name.replace('nativeedge-', 'cloudify-')
-    url_plugin_id = f'https://{MARKET_PLACE_DOMAIN}/' \
+    url_plugin_id = f'{get_marketplace_url()}/' \
         f'plugins?name={plugin_name}'
-    json_resp = get_json_from_marketplace(url_plugin_id)
+    json_resp = get_marketplace_cache().get_json(
+        cache.PLUGIN_IDS, plugin_name, url_plugin_id)
     if 'items' in json_resp:
         if len(json_resp['items']) == 1:
             return json_resp['items'][0]['id']
 
 
 def get_plugin_versions_from_marketplace(plugin_id):
-    url_plugin_version = f'https://{MARKET_PLACE_DOMAIN}/' \
+    url_plugin_version = f'{get_marketplace_url()}/' \
         f'plugins/{plugin_id}/versions?'
-    json_resp = get_json_from_marketplace(url_plugin_version)
+    json_resp = get_marketplace_cache().get_json(
+        cache.PLUGIN_VERSIONS, str(plugin_id), url_plugin_version)
     if 'items' in json_resp:
-        versions = [item['version'] for item in json_resp['items']]
-        return sorted(versions, key=lambda x: version_parse(x))
+        # Unsorted, plugin_versions.VersionIndex parses and sorts them once.
+        return [item['version'] for item in json_resp['items']]
     return []
 
 
 def get_plugin_release_spec_from_marketplace(plugin_id, plugin_version):
-    release_url = f'https://{MARKET_PLACE_DOMAIN}/' \
+    release_url = f'{get_marketplace_url()}/' \
         f'plugins/{plugin_id}/{plugin_version}'
-    return get_json_from_marketplace(release_url)
-
-
-def validate_versions(versions, validations):
-    for neq in validations['!=']:
-        if neq in versions:
-            versions.remove(neq)
-    for gteq in validations['>=']:
-        parsed_gteq = version_parse(gteq)
-        versions = [v for v in versions if version_parse(v) >= parsed_gteq]
-    for lteq in validations['<=']:
-        parsed_lteq = version_parse(lteq)
-        versions = [v for v in versions if version_parse(v) <= parsed_lteq]
-    for gt in validations['>']:
-        parsed_gt = version_parse(gt)
-        versions = [v for v in versions if version_parse(v) > parsed_gt]
-    for lt in validations['<=']:
-        parsed_lt = version_parse(lt)
-        versions = [v for v in versions if version_parse(v) < parsed_lt]
-    return versions
-
-
-def get_validations(version_constraints):
-    validations = {
-        '==': [],
-        '!=': [],
-        '>=': [],
-        '<=': [],
-        '>': [],
-        '<': [],
-    }
-    # Organize the version constraints so we get a dict like this:
-    # {
-    #    '==': [],
-    #    '!=': ['1.0'],
-    #    '>=': ['0.8', 0.9'],
-    #    '<=': ['1.1'],
-    # }
-    try:
-        for version_constraint in version_constraints:
-            sign = re.match('[\\<\\>\\=\\!]+', version_constraint).group(0)
-            plugin_version = re.findall(
-                '(\\d+.\\d+.\\d+)', version_constraint)[0]
-            validations[sign].append(plugin_version)
-    except Exception as e:
-        raise YamlLintConfigError('invalid version: %s' % e)
-    return validations
-
-
-def get_version_constraints(plugin_name, plugin_version_string):
-    version_constraints = list(
-        # Get rid of irrelevant stringy stuff.
-        filter(
-            lambda item: item, re.split(
-                'plugin:| |{}|,'.format(plugin_name),
-                plugin_version_string)
-        )
-    )
-    # re.split is afraid of this one.
-    if '?version' in version_constraints:
-        version_constraints.remove('?version')
-    if 'version=' in version_constraints:
-        version_constraints.remove('version=')
-    return version_constraints
+    return get_marketplace_cache().get_json(
+        cache.RELEASE_SPECS, f'{plugin_id}/{plugin_version}', release_url)
 
 
 def get_plugin_spec(plugin_version_string, plugin_name):
-
-    version_constraints = get_version_constraints(
-        plugin_name, plugin_version_string)
-
-    validations = get_validations(version_constraints)
+    # Report invalid constraints before asking the marketplace.
+    plugin_versions.parse_validations(plugin_name, plugin_version_string)
 
     plugin_id = get_plugin_id_from_marketplace(plugin_name)
     if not plugin_id:
         return
-    versions = get_plugin_versions_from_marketplace(plugin_id)
-
-    if len(validations['==']) == 1 and validations['=='][0] in versions:
-        return get_plugin_release_spec_from_marketplace(
-            plugin_id, validations['=='][0])
-
-    versions = validate_versions(versions, validations)
-
-    if len(versions):
-        return get_plugin_release_spec_from_marketplace(
-            plugin_id, versions[-1])
+    version = plugin_versions.resolve_version(
+        plugin_name,
+        plugin_version_string,
+        tuple(get_plugin_versions_from_marketplace(plugin_id)))
+    if version:
+        return get_plugin_release_spec_from_marketplace(plugin_id, version)
 
 
 def get_plugin_yaml_url(plugin_import):
     plugin_name, plugin_spec = _get_plugin_spec(plugin_import)
     if not plugin_spec:
-        return LATEST_PLUGIN_YAMLS.get(plugin_name)
+        return get_latest_plugin_yaml_url(plugin_name)
     elif len(plugin_spec.get('yaml_urls', [])):
         return plugin_spec['yaml_urls'][0]['url']
 
@@ -287,121 +343,577 @@ def get_node_types_for_plugin_import(plugin_import):
 
 
 def get_node_types_for_plugin_version(plugin_name, plugin_version):
+    """Return the node types of a plugin version from the marketplace.
+
+    The first page tells how many node types there are, then the other
+    pages are requested at the same time and merged in offset order.
+    """
     plugin_name = plugin_name.replace('nativeedge-', 'cloudify-')
-    node_types = {}
-    offset = 0
-    while True:
-        url = f'https://{MARKET_PLACE_DOMAIN}/node-types?' \
-            f'&plugin_name={plugin_name}' \
-            f'&plugin_version={plugin_version}' \
-            f'&offset={offset}'
-        result = get_json_from_marketplace(url)
-        if 'items' in result:
-            for item in result['items']:
-                item['type'] = item['type'].replace(
-                    'cloudify.nodes', 'nativeedge.nodes')
-                if item['type'] not in node_types:
-                    node_types[item['type']] = item
-            # Stop paginating results when the offset has been incrimented
-            # Beyond the amount of total reported results.
-            if result['pagination']['total'] <= offset:
-                break
-            offset += 100
-            url = re.sub(r'offset=\d+', 'offset={}'.format(offset), url)
+    url = f'{get_marketplace_url()}/node-types?' \
+        f'&plugin_name={plugin_name}' \
+        f'&plugin_version={plugin_version}' \
+        '&offset={offset}'
+
+    # The pages are requested with the network settings of the lint.
+    settings = http_client.get_settings()
 
+    def get_page(offset):
+        with settings.active():
+            return get_json_from_marketplace(url.format(offset=offset))
+
+    pages = [get_page(0)]
+    try:
+        total = int(pages[0]['pagination']['total'])
+    except (KeyError, TypeError, ValueError):
+        total = 0
+    offsets = range(NODE_TYPES_PAGE_SIZE, total, NODE_TYPES_PAGE_SIZE)
+    if offsets:
+        with ThreadPoolExecutor(
+                max_workers=min(MAX_PAGE_WORKERS, len(offsets))) as pool:
+            pages.extend(pool.map(get_page, offsets))
+
+    node_types = {}
+    for page in pages:
+        # A page that could not be found has no items.
+        for item in page.get('items', []):
+            item['type'] = item['type'].replace(
+                'cloudify.nodes', 'nativeedge.nodes')
+            if item['type'] not in node_types:
+                node_types[item['type']] = item
     return node_types
 
 
-def delete_cache_item(cache_item_path, cache_ttl):
-    if cache_item_path.exists():
-        # Check if the file has been stale for a while
-        if cache_item_path.stat().st_ctime + cache_ttl < time.time():
+def get_runtime_cache_dir():
+    """Return the cache directory, see cache.get_cache_root().
+
+    When it cannot be created, e.g. on a read only home directory, a
+    directory of the user under the system temporary directory is used
+    instead.
+
+    :raises PermissionError: If that directory belongs to another user,
+        or others may write to it.
+    """
+    cache_dir = pathlib.Path(cache.get_cache_root()).resolve()
+    try:
+        os.makedirs(cache_dir.absolute(), exist_ok=True)
+    except OSError:
+        cache_dir = get_temporary_cache_dir()
+    return cache_dir
+
+
+def get_temporary_cache_dir():
+    # The temporary directory is shared by every user, and cached imports
+    # are trusted, so no one else may own or write to the directory.
+    uid = os.getuid() if hasattr(os, 'getuid') else None
+    cache_dir = pathlib.Path(
+        tempfile.gettempdir(),
+        'ne-lint-cache-{}'.format(uid if uid is not None else 'user'))
+    os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+    cache_dir = cache_dir.resolve()
+    stat = cache_dir.stat()
+    if uid is not None and \
+            (stat.st_uid != uid or stat.st_mode & 0o022):
+        raise PermissionError(
+            'The cache directory {} is not private to this user, set '
+            '{} to another directory.'.format(cache_dir, cache.CACHE_DIR_ENV))
+    return cache_dir
+
+
+def get_cache_store():
+    return cache.open_store(get_runtime_cache_dir())
+
+
+def read_or_fetch(import_item, fetch, cache_ttl=None):
+    """Return a cached import, or fetch it and cache it.
+
+    Imports are cached by canonical_import(). While a lint fetches an
+    import, other lints of the same import wait for it, and get what it
+    fetched in this process or read it from the cache in others.
+
+    An import older than the TTL is returned as it is and fetched again
+    later, see refresh_import(), until it is cache.IMPORTS.max_stale old.
+    Offline, an import is read from the cache however old it is.
+
+    :param import_item: The import string.
+    :param fetch: A function that takes the cached CacheEntry of the
+        import to revalidate, or None, and returns a new CacheEntry. An
+        empty import means it could not be fetched, and is not cached. It
+        is picklable where imports are refreshed in another process.
+    :param cache_ttl: The seconds that a cached import is fresh for.
+    :raises http_client.OfflineError: Offline, if it is not cached.
+    :raises urllib.error.URLError: If it could not be fetched, and it is
+        not cached or is older than max_stale.
+    """
+    cache_ttl = cache_ttl or cache.IMPORTS.ttl
+    max_stale = max(cache_ttl, cache.IMPORTS.max_stale)
+    store = get_cache_store()
+    key = canonical_import(import_item)
+    lock_path = get_import_lock_path(key)
+
+    def read(seconds):
+        entry = store.get(cache.IMPORTS.name, key)
+        if entry and (seconds is None or cache.is_fresh(entry, seconds)):
+            return entry
+
+    def fetch_and_cache(entry):
+        fetched = fetch(entry)
+        if not fetched.value and entry:
+            # Let fetch_import fall back to the old import.
+            raise urllib.error.URLError(
+                '{} could not be fetched'.format(import_item))
+        if fetched.value:
+            store.put(cache.IMPORTS.name, key, fetched, cache_ttl)
+        return fetched.value
+
+    if http_client.get_settings().offline:
+        entry = read(None)
+        if not entry:
+            raise http_client.OfflineError(
+                'offline, {} is not cached'.format(import_item))
+        return entry.value
+    entry = read(max_stale)
+    if entry:
+        if not cache.is_fresh(entry, cache_ttl):
+            cache.refresh_later(
+                key,
+                functools.partial(refresh_import, import_item, fetch,
+                                  cache_ttl))
+        return entry.value
+
+    def read_or_fetch_locked():
+        with cache.lock(lock_path):
+            entry = read(None)
+            if entry and cache.is_fresh(entry, max_stale):
+                return entry.value
+            # An import too old to use is still revalidated.
+            return fetch_and_cache(entry)
+
+    return import_flight.do((store, key), read_or_fetch_locked)
+
+
+def refresh_import(import_item, fetch, cache_ttl=None):
+    """Fetch a stale import again and cache it, unless it was already.
+
+    See read_or_fetch().
+    """
+    cache_ttl = cache_ttl or cache.IMPORTS.ttl
+    store = get_cache_store()
+    key = canonical_import(import_item)
+    with cache.lock(get_import_lock_path(key)):
+        entry = store.get(cache.IMPORTS.name, key)
+        if entry and cache.is_fresh(entry, cache_ttl):
+            return
+        fetched = fetch(entry)
+        if fetched.value:
+            store.put(cache.IMPORTS.name, key, fetched, cache_ttl)
+
+
+def read_cached_import(import_item, error):
+    """Return an import that could not be fetched from the cache.
+
+    :param import_item: A remote import.
+    :param error: Why it could not be fetched.
+    :return: What fetch_import returns, 'stale' and the cached import
+        however old it is, or 'unavailable' and {}.
+    """
+    entry = get_cache_store().get(
+        cache.IMPORTS.name, canonical_import(import_item))
+    if entry is None:
+        logger.warning(f'Unable to read import {import_item}: {error}.')
+        return 'unavailable', {}
+    logger.warning(f'Unable to read import {import_item}: {error}, using '
+                   f'the copy cached {cache.format_age(entry)} ago.')
+    if urlparse(import_item).scheme == 'plugin':
+        return 'stale', {'node_types': entry.value}
+    return 'stale', entry.value
+
+
+def get_import_digest(import_item):
+    """Return the digest of a cached import, or None."""
+    return get_cache_store().digest(cache.IMPORTS.name,
+                                    canonical_import(import_item))
+
+
+def canonical_import(import_item):
+    """Return the same string for the imports that read the same thing.
+
+    The version constraints of a plugin import are sorted, and the
+    spaces around them are dropped.
+    """
+    parsed_import_item = urlparse(import_item)
+    if parsed_import_item.scheme != 'plugin':
+        return import_item
+    plugin_name = parsed_import_item.path.strip()
+    constraints = get_version_constraints(plugin_name,
+                                          parsed_import_item.query)
+    if not constraints:
+        return 'plugin:{}'.format(plugin_name)
+    return 'plugin:{}?{}'.format(plugin_name,
+                                 ','.join(sorted(constraints)))
+
+
+def import_dsl_yaml(import_item, base_path=None, cache_ttl=None):
+    merge_import(import_item,
+                 fetch_import(import_item, base_path, cache_ttl),
+                 base_path)
+
+
+def get_import_lock_path(import_item):
+    lock_item = re.sub('[^0-9a-zA-Z]+', '_', import_item)
+    return os.path.join(get_runtime_cache_dir(), LOCKS_DIR, lock_item)
+
+
+def fetch_imports(imports):
+    """Read imports in a pool of threads.
+
+    :param imports: A list of (import string, base path) without
+        duplicates, where the base path is the directory of the file that
+        has the import.
+    :return: A list of what fetch_import returned for every import, in
+        the order of imports, or None where an import could not be read.
+    """
+    # The imports are read with the network settings of the lint.
+    settings = http_client.get_settings()
+
+    def fetch(args):
+        try:
+            with settings.active():
+                return fetch_import(*args)
+        except OSError:
+            return
+
+    if len(imports) < 2:
+        return [fetch(args) for args in imports]
+    with ThreadPoolExecutor(
+            max_workers=min(MAX_IMPORT_WORKERS, len(imports))) as pool:
+        return list(pool.map(fetch, imports))
+
+
+# A read import. The key tells imports apart however they are written.
+# A node can be reused while the file at path has the stamp, and until it
+# expires, where they are not None.
+ImportNode = namedtuple('ImportNode', ['key',
+                                       'source',
+                                       'content',
+                                       'imports',
+                                       'path',
+                                       'stamp',
+                                       'expires'])
+
+
+class ImportGraph(object):
+    """Resolves the imports of blueprints, and the imports of those.
+
+    Every import is read once per process while it is unchanged, and
+    shared by the lints in the process: a local import while its file
+    has the same path, modification time and size, a remote one for
+    REMOTE_NODE_TTL seconds.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._nodes = {}
+
+    def resolve(self, import_items, base_path=None):
+        """Return the imports of a blueprint, in the order to merge them.
+
+        The imports of every import are merged before it. An import that
+        was merged already is not merged again when another import
+        imports it, while the blueprint imports are merged as listed.
+
+        :param import_items: The imports of the blueprint.
+        :param base_path: The directory of the blueprint.
+        :return: A list of (import, base path, what fetch_import returned
+            for it), a dict of blueprint import to the imports of a cycle
+            that it leads to, and a dict of every import of an import to
+            the blueprint import that it was merged for.
+        """
+        nodes = self.load([(i, base_path) for i in import_items])
+        order = []
+        cycles = {}
+        nested = {}
+        merged = set()
+
+        def visit(edge, path, top):
+            node = nodes[edge]
+            if node is None:
+                return
+            keys = [key for key, _ in path]
+            if node.key in keys:
+                cycle = [item for _, item in path[keys.index(node.key):]]
+                cycles.setdefault(top, cycle + [edge[0]])
+                return
+            if path and node.key in merged:
+                return
+            if path and edge[0] not in import_items:
+                nested.setdefault(edge[0], top)
+            path.append((node.key, edge[0]))
+            for child in node.imports:
+                visit(child, path, top)
+            path.pop()
+            merged.add(node.key)
+            order.append((edge[0], edge[1], self.fetched(node)))
+
+        for import_item in import_items:
+            visit((import_item, base_path), [], import_item)
+        return order, cycles, nested
+
+    def load(self, edges):
+        """Read imports and everything that they import.
+
+        :param edges: A list of (import string, base path).
+        :return: A dict of (import string, base path) to its ImportNode,
+            or None if it could not be read.
+        """
+        nodes = {}
+        while edges:
+            edges = [edge for edge in dict.fromkeys(edges)
+                     if edge not in nodes]
+            missing = []
+            for edge in edges:
+                nodes[edge] = self._get(edge)
+                if nodes[edge] is None:
+                    missing.append(edge)
+            for edge, fetched in zip(missing, fetch_imports(missing)):
+                nodes[edge] = self._add(edge, fetched)
+            edges = [child for edge in edges if nodes[edge]
+                     for child in nodes[edge].imports]
+        return nodes
+
+    @staticmethod
+    def fetched(node):
+        """Return what fetch_import returned for a node, as a copy."""
+        if isinstance(node.content, bytes):
+            return node.source, cache.load_value(node.content)
+        return node.source, node.content
+
+    def _get(self, edge):
+        with self._lock:
+            node = self._nodes.get(edge)
+        if node is None:
+            return
+        if node.expires is not None and node.expires < time.time():
+            return
+        if node.stamp is not None:
+            try:
+                if cache.DocumentCache.key(node.path) != node.stamp:
+                    return
+            except OSError:
+                return
+        return node
+
+    def _add(self, edge, fetched):
+        if fetched is None:
+            return
+        import_item, base_path = edge
+        source, result = fetched
+        key = (import_item, base_path)
+        path = stamp = expires = None
+        imports = []
+        if source in ['relative', 'path']:
+            path = import_item
+            if source == 'relative':
+                path = os.path.join(base_path, import_item)
+            key = os.path.realpath(path)
+            imports = get_child_imports(result, os.path.dirname(key))
             try:
-                os.remove(cache_item_path)
+                stamp = cache.DocumentCache.key(path)
             except OSError:
                 pass
+        elif source in ['plugin', 'url']:
+            key = canonical_import(import_item)
+            if source == 'url':
+                imports = get_child_imports(result, url=import_item)
+            expires = time.time() + REMOTE_NODE_TTL
+        elif source == 'default':
+            key = import_item
+        elif source in ['uncached', 'stale', 'unavailable']:
+            key = canonical_import(import_item)
+        node = ImportNode(key, source, result, imports, path, stamp, expires)
+        if stamp is None and expires is None and source != 'default':
+            return node
+        try:
+            node = node._replace(content=cache.dump_value(result))
+        except ValueError:
+            return node
+        with self._lock:
+            self._nodes[edge] = node
+        return node
 
 
-def import_dsl_yaml(import_item, base_path=None, cache_ttl=None):
-    cache_ttl = cache_ttl or 86400
-    cache_item = re.sub('[^0-9a-zA-Z]+', '_', import_item)
-    current_dir = pathlib.Path(__file__).parent.resolve()
-    cache_dir = pathlib.Path(os.path.join(
-        current_dir,
-        'nativeedge/__nelint_runtime_cache')).resolve()
-    if not cache_dir.exists():
-        os.makedirs(cache_dir.absolute())
-    cache_item_path = pathlib.Path(
-        os.path.join(cache_dir.absolute(), cache_item))
-    delete_cache_item(cache_item_path, cache_ttl)
+import_graph = ImportGraph()
 
-    result = {}
+
+def get_child_imports(document, base_path=None, url=None):
+    """Return the imports of an imported document.
+
+    :param document: The imported document.
+    :param base_path: The directory of a local document.
+    :param url: The URL of a remote document.
+    :return: A list of (import string, base path).
+    """
+    if not isinstance(document, dict) or \
+            not isinstance(document.get('imports'), list):
+        return []
+    imports = []
+    for import_item in document['imports']:
+        if not isinstance(import_item, str):
+            continue
+        if urlparse(import_item).scheme in REMOTE_IMPORT_SCHEMES or \
+                import_item in DEFAULT_IMPORTS:
+            imports.append((import_item, None))
+        elif url:
+            imports.append((urljoin(url, import_item), None))
+        else:
+            imports.append((import_item, base_path))
+    return imports
+
+
+def fetch_import(import_item, base_path=None, cache_ttl=None):
+    """Read an import from the marketplace, a URL or a file.
+
+    This does not touch the lint context, so that imports can be read in
+    other threads. See merge_import.
+
+    A remote import that cannot be read is read from the cache however
+    old it is, see read_cached_import.
+
+    :return: A tuple of where the import was read from, one of 'plugin',
+        'url', 'default', 'relative', 'path', 'uncached' when offline and
+        the import is not cached, 'stale' when it could not be read and
+        an old cached copy was, 'unavailable' when it could not be read
+        at all, or None, and the imported document.
+    """
     parsed_import_item = urlparse(import_item)
+    source = None
+    result = {}
     if parsed_import_item.scheme == 'plugin':
-        if cache_item_path.exists():
-            with open(cache_item_path.absolute(), 'r') as jsonfile:
-                result['node_types'] = json.load(jsonfile)
-        else:
-            node_types = get_node_types_for_plugin_import(
-                import_item)
-            result['node_types'] = node_types
-            try:
-                with open(cache_item_path.absolute(), 'w') as jsonfile:
-                    json.dump(node_types, jsonfile)
-            except OSError:
-                logger.debug(f'Not pushing to cache: {cache_item_path}')
+        source = 'plugin'
+        try:
+            result['node_types'] = read_or_fetch(
+                import_item,
+                functools.partial(fetch_plugin, import_item),
+                cache_ttl)
+        except http_client.OfflineError:
+            return 'uncached', {}
+        except urllib.error.URLError as e:
+            return read_cached_import(import_item, e)
+
+    if parsed_import_item.scheme in ['http', 'https']:
+        source = 'url'
+        try:
+            result = read_or_fetch(import_item,
+                                   functools.partial(fetch_url, import_item),
+                                   cache_ttl)
+        except http_client.OfflineError:
+            return 'uncached', {}
+        except urllib.error.URLError as e:
+            return read_cached_import(import_item, e)
+    # TODO: Replace with nativeedge.
+    elif import_item in DEFAULT_IMPORTS:
+        source = 'default'
+        result = DEFAULT_TYPES
+    elif base_path and os.path.exists(os.path.join(base_path, import_item)):
+        source = 'relative'
+        result = load_yaml_file(os.path.join(base_path, import_item))
+
+    elif os.path.exists(import_item):
+        source = 'path'
+        result = load_yaml_file(import_item)
+        result = result or {}
+    return source, result
+
+
+def fetch_plugin(import_item, entry=None):
+    """Return a CacheEntry of the node types of a plugin import.
+
+    The marketplace responses are revalidated on their own, see
+    cache.MarketplaceCache, so entry is not.
+    """
+    fetched = time.time()
+    return cache.CacheEntry(
+        get_node_types_for_plugin_import(import_item), fetched, None, None)
+
+
+def fetch_url(import_item, entry=None):
+    """Return a CacheEntry of a URL import.
+
+    :param entry: The cached CacheEntry of the import to revalidate with
+        its ETag and Last-Modified validators, or None. A 304 response
+        renews it.
+    """
+    fetched = time.time()
+    headers = dict(cache.get_validator_headers(entry),
+                   **{'User-Agent': 'Mozilla/5.0'})
+    response = http_client.get_client().request(import_item, headers)
+    return cache.make_entry(response, backends.safe_load, fetched, entry)
+
+
+def load_yaml_file(path):
+    """Return a parsed YAML file, parsing it only if it changed.
+
+    See cache.DocumentCache.
+    """
+    def parse(path):
+        with open(path, 'r') as stream:
+            return backends.safe_load(stream)
+
+    return cache.open_documents(get_runtime_cache_dir()).load(path, parse)
+
+
+def merge_import(import_item, fetched, base_path=None):
+    """Add an import that fetch_import read to the lint context.
+
+    :param import_item: The import string.
+    :param fetched: What fetch_import returned for the import.
+    :param base_path: The directory of the blueprint.
+    """
+    source, result = fetched
+    parsed_import_item = urlparse(import_item)
+    # An import may be written the same way in files of other directories.
+    sources = context['resolved_imports'].setdefault(import_item, [])
+    sources.extend(
+        source for source in get_import_sources(
+            import_item, parsed_import_item, base_path)
+        if source not in sources)
+    if source in ['stale', 'unavailable']:
+        context['unavailable_imports'][import_item] = source == 'stale'
+        if source == 'stale' and parsed_import_item.scheme == 'plugin':
+            source = 'plugin'
+    if source == 'plugin':
+        # The fetched document may be shared by several imports.
+        result = dict(result)
         # This is kind of wasteful, but
         # what this does is it stores the node types also
         # per plugin import line.
         # this enables us to analyze
         # if a plugin is being used.
         for k in result['node_types'].keys():
-            if k not in context['node_types_props']:
-                context['node_types_props'][k] = {}
             node_type_props = result['node_types'][k].get('properties', {})
-            context['node_types_props'][k].update(node_type_props or {})
+            # Copy the entry, it may be shared by every lint.
+            props = dict(context['node_types_props'].get(k, {}))
+            props.update(node_type_props or {})
+            context['node_types_props'][k] = props
             if UNUSED_IMPORT not in result:
                 result[UNUSED_IMPORT] = {}
             if import_item not in result[UNUSED_IMPORT]:
-                result[UNUSED_IMPORT][import_item] = []
-            result[UNUSED_IMPORT][import_item].append(k)
-
-    if parsed_import_item.scheme in ['http', 'https']:
-        if cache_item_path.exists():
-            with open(cache_item_path.absolute(), 'r') as jsonfile:
-                result = json.load(jsonfile)
-        else:
-            page = urllib.request.Request(
-                import_item,
-                headers={'User-Agent': 'Mozilla/5.0'}
-            )
-            try:
-                infile = urllib.request.urlopen(page).read()
-            except urllib.error.HTTPError:
-                print('Error: Unable to reach URL: {}'.format(import_item))
-                sys.exit(1)
-            result = yaml.safe_load(infile)
-            with open(cache_item_path.absolute(), 'w') as jsonfile:
-                json.dump(result, jsonfile)
-    # TODO: Replace with nativeedge.
-    elif import_item in ['nativeedge/types/types.yaml',
-                         'cloudify/types/types.yaml']:
-        result = DEFAULT_TYPES
-    elif base_path and os.path.exists(os.path.join(base_path, import_item)):
-        with open(os.path.join(base_path, import_item), 'r') as stream:
-            result = yaml.safe_load(stream)
-            node_types_used = make_list_types(result)
-            delete_imports_from_unused_ctx(node_types_used)
-            add_to_imported_node_types(node_types_used)
-
-    elif os.path.exists(import_item):
-        with open(import_item, 'r') as stream:
-            result = yaml.safe_load(stream)
-        result = result or {}
+                result[UNUSED_IMPORT][import_item] = set()
+            result[UNUSED_IMPORT][import_item].add(k)
+            context[PLUGINS_BY_NODE_TYPE].setdefault(k, set()).add(
+                import_item)
+    elif source == 'uncached':
+        context['uncached_imports'].append(import_item)
+    elif source == 'relative':
+        node_types_used = make_list_types(result)
+        delete_imports_from_unused_ctx(node_types_used)
+        add_to_imported_node_types(node_types_used)
 
     for k in result.keys():
         left = 'imported_{}'.format(k)
-        if left not in context:
+        if left == 'imported_node_types' and \
+                isinstance(context.get(left), dict):
+            context[left].update(dict.fromkeys(result[k]))
+        elif left not in context:
             if isinstance(result[k], dict) and left in ['imported_node_types']:
                 context[left] = list(result[k].keys())
             else:
@@ -428,16 +940,48 @@ def import_dsl_yaml(import_item, base_path=None, cache_ttl=None):
             context[left].update(result[k])
 
 
+def get_import_sources(import_item, parsed_import_item, base_path):
+    """Return the files that an import may be read from.
+
+    A remote import is read from the cache store, not from a file, see
+    get_import_digest(). A local import is read from the first of its
+    candidate paths that exists.
+    """
+    if parsed_import_item.scheme in REMOTE_IMPORT_SCHEMES:
+        return []
+    elif import_item in DEFAULT_IMPORTS:
+        return []
+    sources = [os.path.abspath(import_item)]
+    if base_path:
+        sources.insert(0, os.path.join(base_path, import_item))
+    return sources
+
+
+def get_unused_imports_of_node_type(node_type, session=None):
+    """Return the plugin imports that have a node type and are unused.
+
+    :param node_type: A node type name.
+    :param session: The lint context, by default the current one.
+    """
+    session = context if session is None else session
+    unused_imports = session[UNUSED_IMPORT_CTX]
+    index = session.get(PLUGINS_BY_NODE_TYPE)
+    if index is None:
+        # A context that was built without the index.
+        return [import_item for import_item, types in unused_imports.items()
+                if node_type in types]
+    try:
+        return [import_item for import_item in index.get(node_type, ())
+                if import_item in unused_imports]
+    except TypeError:
+        # Unhashable node types are never imported.
+        return []
+
+
 def delete_imports_from_unused_ctx(node_types_used):
-    need_to_del = []
-    unused_import = context[UNUSED_IMPORT_CTX].keys()
     for type in node_types_used:
-        for k in unused_import:
-            if type in context[UNUSED_IMPORT_CTX][k]:
-                need_to_del.append(k)
-
-    for d in need_to_del:
-        del context[UNUSED_IMPORT_CTX][d]
+        for import_item in get_unused_imports_of_node_type(type):
+            del context[UNUSED_IMPORT_CTX][import_item]
 
     if 'plugin:nativeedge-fabric-plugin' in context[UNUSED_IMPORT_CTX].keys():
         del context[UNUSED_IMPORT_CTX]['plugin:nativeedge-fabric-plugin']
@@ -485,29 +1029,30 @@ def find_values_by_key(yaml_data, keys):
     return values
 
 
-def setup_types(buffer=None, data=None, base_path=None):
-    current_dir = pathlib.Path(__file__).parent.resolve()
-    props_json = pathlib.Path(os.path.join(
-        current_dir,
-        'nativeedge/properties.json')).resolve()
-    types_json = pathlib.Path(os.path.join(
-        current_dir,
-        'nativeedge/datatypes.json')).resolve()
-    with open(props_json, 'r') as inf:
-        context['node_types_props'] = json.load(inf)
-    with open(types_json, 'r') as inf:
-        context['data_types'] = json.load(inf)
+def setup_types(buffer=None, data=None, base_path=None, parsed=None):
+    # The bundled schemas are shared by every lint in the process, the
+    # types of this blueprint and its imports go on a layer over them.
+    context['node_types_props'], context['data_types'] = \
+        schemas.get_registry().layer()
     try:
-        data = data or yaml.safe_load(buffer)
+        if parsed is not None:
+            data = data or parsed.data
+        else:
+            data = data or backends.safe_load(buffer)
     except yaml.parser.ParserError:
         return
     if not data:
         return
-    for imported in data.get('imports', {}):
-        if not isinstance(imported, str):
-            continue
+    # Imports are read concurrently, and then added to the context in the
+    # order they are listed, so that the results do not depend on timing.
+    # The imports of imports are merged before them, see ImportGraph.
+    imports = [imported for imported in data.get('imports', {})
+               if isinstance(imported, str)]
+    order, context['import_cycles'], context['nested_imports'] = \
+        import_graph.resolve(imports, base_path)
+    for imported, imported_base_path, fetched in order:
         try:
-            import_dsl_yaml(imported, base_path=base_path)
+            merge_import(imported, fetched, base_path=imported_base_path)
         except OSError:
             pass
     add_to_node_types(data.get('node_types', {}))
@@ -515,16 +1060,15 @@ def setup_types(buffer=None, data=None, base_path=None):
 
 
 def add_to_imported_node_types(node_types_used):
-    if isinstance(node_types_used, list):
-        for item in node_types_used:
-            if item not in context['imported_node_types']:
-                context['imported_node_types'].append(item)
-    elif node_types_used not in context['imported_node_types']:
-        context['imported_node_types'].append(node_types_used)
+    if not isinstance(node_types_used, list):
+        node_types_used = [node_types_used]
+    context['imported_node_types'].update(
+        dict.fromkeys(item for item in node_types_used
+                      if isinstance(item, str)))
 
 
 def add_to_node_types(node_types):
-    context['imported_node_types'].extend(node_types.keys())
+    context['imported_node_types'].update(dict.fromkeys(node_types))
 
 
 def add_to_data_types(data_types):
@@ -638,6 +1182,11 @@ def recurse_mapping(mapping):
 
 
 def process_relevant_tokens(model, keyword):
+    """Run a rule only for the model tokens under the given keywords.
+
+    The keywords are also kept on the rule as "keywords", so that the
+    nodes can be dispatched only to the rules that handle their key.
+    """
     def wrapper_outer(function):
         def wrapper_inner(*args, **kwargs):
             token = kwargs.get('token')
@@ -648,6 +1197,8 @@ def process_relevant_tokens(model, keyword):
                 if isinstance(keyword, list):
                     if token.prev and token.prev.node.value in keyword:
                         yield from function(*args, **kwargs)
+        wrapper_inner.keywords = \
+            (keyword,) if isinstance(keyword, str) else tuple(keyword)
         return wrapper_inner
     return wrapper_outer
 
@@ -676,10 +1227,7 @@ def update_dict_values_recursive(default_dict, user_dict):
 
 
 def check_node_imported(node_name):
-    for keys in context['imported_node_types_by_plugin']:
-        if node_name in context['imported_node_types_by_plugin'][keys]:
-            return True
-    return False
+    return bool(get_unused_imports_of_node_type(node_name))
 
 
 def recurse_get_readable_object(mapping):
@@ -29,12 +29,12 @@ setup(
     license='LICENSE',
     packages=find_packages(),
     description='Linter for NativeEdge Blueprints',
-    entry_points={"console_scripts": ["ne-lint = ne_lint.main:lint"]},
+    entry_points={"console_scripts": ["ne-lint = ne_lint.main:main"]},
     package_data={
         'ne_lint': [
-            'yamllint_ext/nativeedge/__nelint_runtime_cache/README.md',
             'yamllint_ext/nativeedge/properties.json',
-            'yamllint_ext/nativeedge/datatypes.json'
+            'yamllint_ext/nativeedge/datatypes.json',
+            'yamllint_ext/nativeedge/schemas.bundle'
         ]
     },
     install_requires=install_requires